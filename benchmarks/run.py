@@ -0,0 +1,398 @@
+"""Benchmarks for Plost's chart functions.
+
+Runs every public chart function against synthetic DataFrames of different sizes, in long and wide
+format, and records for each one:
+
+    - seconds: how long building the spec takes (best of a few runs).
+    - payload_bytes: size of what would be sent to the browser, that is the spec as JSON plus each
+      dataset as an Arrow IPC stream.
+    - peak_bytes: peak memory allocated while building the spec, as seen by tracemalloc. This
+      covers Python, NumPy and Pandas allocations, but not Arrow's.
+
+st.vega_lite_chart is replaced by a stub that keeps the spec, so no Streamlit server is needed.
+
+Results are compared with the baselines stored in baselines.json, and the script exits with an
+error if any of them regressed by more than the allowed tolerance. Timings depend on the machine,
+so re-record the baselines (with --update) before comparing on a new one.
+
+By default only a small grid of sizes is run. Set PLOST_BENCH_FULL=1 or pass --full for the whole
+grid, which goes up to 10 million rows and 500 series and takes a while.
+
+Usage:
+
+    python benchmarks/run.py                # Compare with the baselines.
+    python benchmarks/run.py --update       # Re-record the baselines.
+    python benchmarks/run.py -k line_chart  # Only run cases whose name contains "line_chart".
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import plost  # noqa: E402
+
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+# Total number of rows, and number of series, of the synthetic DataFrames.
+# The default grid includes a size above the server_compute_rows option, so the compute='auto'
+# server paths get measured too.
+DEFAULT_GRID = dict(rows=[1_000, 100_000, 200_000], series=[1, 10])
+FULL_GRID = dict(rows=[1_000, 10_000, 100_000, 1_000_000, 10_000_000], series=[1, 10, 100, 500])
+
+# How many times to time each case. The best time is kept, since the slower runs are the ones
+# that got interrupted by something else on the machine.
+REPEATS = 10
+
+# How much worse than the baseline each metric can get before it counts as a regression.
+DEFAULT_TOLERANCES = dict(seconds=0.5, payload_bytes=0.01, peak_bytes=0.2)
+
+# Timings that grow by less than this many seconds are within noise, whatever the percentage.
+SECONDS_NOISE = 0.05
+
+SEED = 0
+
+
+# Synthetic data ---------------------------------------------------------------------------------
+
+def make_long(rows, series):
+    """One row per (time, series) pair, with the series name in its own column."""
+    rng = np.random.default_rng(SEED)
+    steps = max(1, rows // series)
+    names = np.array([f's{i}' for i in range(series)])
+
+    time_values = pd.date_range('2020-01-01', periods=steps, freq='min')
+
+    return pd.DataFrame(dict(
+        time=np.repeat(time_values, series)[:rows],
+        series=np.tile(names, steps)[:rows],
+        value=rng.standard_normal(steps * series)[:rows].cumsum(),
+        value2=rng.standard_normal(steps * series)[:rows],
+        size=rng.integers(1, 100, steps * series)[:rows],
+    ))
+
+
+def make_wide(rows, series):
+    """One row per time, with one column per series. Same number of values as make_long()."""
+    rng = np.random.default_rng(SEED)
+    steps = max(1, rows // series)
+
+    columns = dict(
+        time=pd.date_range('2020-01-01', periods=steps, freq='min'),
+        label=np.array([f'l{i}' for i in range(20)])[np.arange(steps) % 20],
+    )
+
+    for i in range(series):
+        columns[f's{i}'] = rng.standard_normal(steps).cumsum()
+
+    return pd.DataFrame(columns)
+
+
+def series_columns(data):
+    return [c for c in data.columns if c.startswith('s') and c[1:].isdigit()]
+
+
+# Charts -----------------------------------------------------------------------------------------
+
+# Each chart is called with a DataFrame and its format ('long' or 'wide'). Charts that don't
+# support wide-format data are only run on long-format data.
+
+def _line_chart(data, form):
+    if form == 'wide':
+        return plost.line_chart(data, 'time', series_columns(data))
+    return plost.line_chart(data, 'time', 'value', color='series')
+
+
+def _area_chart(data, form):
+    if form == 'wide':
+        return plost.area_chart(data, 'time', series_columns(data))
+    return plost.area_chart(data, 'time', 'value', color='series')
+
+
+def _bar_chart(data, form):
+    if form == 'wide':
+        return plost.bar_chart(data, 'label', series_columns(data))
+    return plost.bar_chart(data, 'series', 'value')
+
+
+def _scatter_chart(data, form):
+    if form == 'wide':
+        return plost.scatter_chart(data, 'time', series_columns(data))
+    return plost.scatter_chart(data, 'value', 'value2', color='series', size='size')
+
+
+def _pie_chart(data, form):
+    return plost.pie_chart(data, 'size', 'series')
+
+
+def _donut_chart(data, form):
+    return plost.donut_chart(data, 'size', 'series')
+
+
+def _event_chart(data, form):
+    return plost.event_chart(data, 'time', 'series')
+
+
+def _time_hist(data, form):
+    return plost.time_hist(data, 'time', 'day', 'hours')
+
+
+def _xy_hist(data, form):
+    return plost.xy_hist(data, 'value', 'value2')
+
+
+def _hist(data, form):
+    return plost.hist(data, 'value')
+
+
+def _scatter_hist(data, form):
+    return plost.scatter_hist(data, 'value', 'value2', color='series')
+
+
+CHARTS = [
+    ('line_chart', _line_chart, ['long', 'wide']),
+    ('area_chart', _area_chart, ['long', 'wide']),
+    ('bar_chart', _bar_chart, ['long', 'wide']),
+    ('scatter_chart', _scatter_chart, ['long', 'wide']),
+    ('pie_chart', _pie_chart, ['long']),
+    ('donut_chart', _donut_chart, ['long']),
+    ('event_chart', _event_chart, ['long']),
+    ('time_hist', _time_hist, ['long']),
+    ('xy_hist', _xy_hist, ['long']),
+    ('hist', _hist, ['long']),
+    ('scatter_hist', _scatter_hist, ['long']),
+]
+
+MAKERS = dict(long=make_long, wide=make_wide)
+
+
+# Measuring --------------------------------------------------------------------------------------
+
+class SpecRecorder:
+    """Stands in for st.vega_lite_chart, keeping the last spec it was given."""
+
+    def __init__(self):
+        self.spec = None
+
+    def __call__(self, spec, use_container_width=False, **kwargs):
+        self.spec = spec
+
+
+def payload_bytes(spec):
+    """Size of a spec as JSON, plus the size of each of its datasets as an Arrow IPC stream."""
+    spec = dict(spec)
+    datasets = spec.pop('datasets', {})
+    data = spec.pop('data', None)
+
+    frames = list(datasets.values())
+    if isinstance(data, pd.DataFrame):
+        frames.append(data)
+
+    nbytes = len(json.dumps(spec, default=str).encode('utf8'))
+
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        nbytes += sink.getvalue().size
+
+    return nbytes
+
+
+def measure(chart, data, form, recorder):
+    seconds = float('inf')
+
+    # So a collection left over from the previous case doesn't land in this one's timings.
+    gc.collect()
+
+    for _ in range(REPEATS):
+        # Otherwise later runs would just hit Plost's spec cache.
+        plost.clear_cache()
+
+        start = time.perf_counter()
+        chart(data, form)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    plost.clear_cache()
+
+    tracemalloc.start()
+    try:
+        chart(data, form)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(
+        seconds=round(seconds, 6),
+        payload_bytes=payload_bytes(recorder.spec),
+        peak_bytes=peak,
+    )
+
+
+def run(grid, name_filter=None, out=sys.stdout, keys=None):
+    recorder = SpecRecorder()
+    plost.st.vega_lite_chart = recorder
+
+    results = {}
+
+    for form, make in MAKERS.items():
+        for rows in grid['rows']:
+            for series in grid['series']:
+                if series > rows:
+                    continue
+
+                data = None
+
+                for name, chart, forms in CHARTS:
+                    key = f'{name}/{form}/{rows}x{series}'
+
+                    if form not in forms or (name_filter and name_filter not in key):
+                        continue
+
+                    if keys is not None and key not in keys:
+                        continue
+
+                    if data is None:
+                        data = make(rows, series)
+
+                    results[key] = measure(chart, data, form, recorder)
+                    print(format_result(key, results[key]), file=out, flush=True)
+
+    return results
+
+
+# Reporting --------------------------------------------------------------------------------------
+
+def format_result(key, result):
+    return (
+        f"{key:<36}"
+        f"{result['seconds'] * 1000:>12.2f} ms"
+        f"{result['payload_bytes'] / 1024:>14.1f} KiB"
+        f"{result['peak_bytes'] / 1024 / 1024:>12.1f} MiB peak")
+
+
+def compare(results, baselines, tolerances):
+    """Return a list of messages, one for each metric that got worse than its baseline allows."""
+    regressions = []
+
+    for key, result in results.items():
+        baseline = baselines.get(key)
+
+        if baseline is None:
+            continue
+
+        for metric, tolerance in tolerances.items():
+            old = baseline.get(metric)
+            new = result[metric]
+
+            if old is None:
+                continue
+
+            if metric == 'seconds' and new - old < SECONDS_NOISE:
+                continue
+
+            if new > old * (1 + tolerance):
+                regressions.append(
+                    f'{key}: {metric} went from {old:,} to {new:,} ({new / old - 1:+.0%})'
+                    if old else f'{key}: {metric} went from 0 to {new:,}')
+
+    return regressions
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding='utf8') as f:
+        return json.load(f)['results']
+
+
+def save_baselines(path, results):
+    content = dict(
+        python=platform.python_version(),
+        pandas=pd.__version__,
+        results=dict(sorted(results.items())),
+    )
+
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(content, f, indent=1)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--update', action='store_true', help='Store the results as the new baselines.')
+    parser.add_argument(
+        '--full', action='store_true', default=bool(os.environ.get('PLOST_BENCH_FULL')),
+        help='Run the full grid of sizes. Same as setting PLOST_BENCH_FULL=1.')
+    parser.add_argument(
+        '-k', dest='name_filter', help='Only run cases whose name contains this string.')
+    parser.add_argument(
+        '--baselines', default=BASELINES_PATH, help='Path of the baselines file.')
+
+    for metric, tolerance in DEFAULT_TOLERANCES.items():
+        parser.add_argument(
+            f"--{metric.replace('_', '-')}-tolerance", dest=metric, type=float,
+            default=tolerance,
+            help=f'Allowed relative increase of {metric}. Default: {tolerance}.')
+
+    args = parser.parse_args(argv)
+
+    grid = FULL_GRID if args.full else DEFAULT_GRID
+
+    results = run(grid, args.name_filter)
+    baselines = load_baselines(args.baselines)
+
+    if args.update:
+        # Keep the baselines of the cases that didn't run.
+        save_baselines(args.baselines, {**baselines, **results})
+        print(f'Saved {len(results)} results to {args.baselines}')
+        return 0
+
+    tolerances = {m: getattr(args, m) for m in DEFAULT_TOLERANCES}
+
+    # A case can look slow just because something else was running on the machine at the time,
+    # so time those again before reporting them.
+    slow = {
+        k for k in results
+        if compare({k: results[k]}, baselines, dict(seconds=tolerances['seconds']))}
+
+    if slow:
+        print(f'\nTiming {len(slow)} slow cases again.')
+
+        for key, result in run(grid, args.name_filter, keys=slow).items():
+            results[key]['seconds'] = min(results[key]['seconds'], result['seconds'])
+
+    regressions = compare(results, baselines, tolerances)
+    missing = [k for k in results if k not in baselines]
+
+    if missing:
+        print(f'\n{len(missing)} cases have no baseline. Record them with --update.')
+
+    if regressions:
+        print(f'\n{len(regressions)} regressions:')
+        for message in regressions:
+            print(f'  {message}')
+        return 1
+
+    print(f'\nNo regressions in {len(results) - len(missing)} cases.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,12 +4,149 @@ A deceptively simple plotting library for Streamlit.
 You've been writing *plots* wrong all this time!
 """
 import copy
+import functools
 import numbers
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 
+from . import _adapters
+from . import _aggregate
+from . import _cache
+from . import _downsample
+from . import _live
+from . import _reshape
+from . import _schema
+from . import _transport
+from . import _window
+
 # Syntactic sugar to make VegaLite more fun.
 D = dict
 
+
+# Global options. See set_option().
+_OPTIONS = D(
+    project_columns=True,
+    server_compute_rows=100_000,
+    wide_format='melt',
+    cache_max_bytes=128 * 1024 * 1024,
+    quantize=False,
+    epoch_dates=True,
+    dictionary_encode=False,
+)
+
+
+def set_option(key, value):
+    """Set a global Plost option.
+
+    Parameters
+    ----------
+    key : str
+        The name of the option to set. Available options:
+            - 'project_columns': If True (default), only the columns that a chart actually uses
+              are sent to the browser. Set to False if you need every column of your DataFrame
+              to reach the Vega-Lite spec.
+            - 'server_compute_rows': Number of rows above which charts with compute='auto'
+              calculate their bins and aggregates in Python rather than in the browser.
+              Defaults to 100,000.
+            - 'wide_format': How to draw several series when y is a list of columns. With
+              'melt' (default), the table is melted into long format in Python. With 'fold',
+              the table is sent as-is and Vega-Lite's fold transform reshapes it in the
+              browser, which avoids creating a table that is as many times larger as there
+              are series.
+            - 'cache_max_bytes': Memory budget, in bytes, for the cache of finished charts.
+              When a chart function is called again with the same arguments and equivalent
+              data (e.g. when Streamlit reruns your script) the finished chart is reused from
+              this cache rather than rebuilt. Data is compared by hashing every row, which is
+              much cheaper than building the chart but still takes a pass over it. Least
+              recently used charts are evicted first. Defaults to 128 MiB. Set to 0 to disable
+              the cache.
+            - 'quantize': If True, numeric columns are shrunk before being sent to the browser.
+              Values drawn as x/y positions are rounded to the precision the chart can show
+              given its size, and columns are downcast to the narrowest type that holds them
+              (e.g. float32, int8). Bytes saved are logged at INFO level to the
+              'plost._transport' logger. Defaults to False.
+            - 'epoch_dates': If True (default), datetime columns drawn as dates (temporal
+              fields, or fields with a timeUnit) are sent as milliseconds since the epoch, which
+              the browser reads much faster than date strings.
+            - 'dictionary_encode': If True, string columns that repeat a few distinct values
+              (e.g. the series names of a long-format table) are sent as a list of those values
+              plus a small integer code per row, rather than as one string per row. Defaults
+              to False.
+    value : any
+        The new value for the option.
+    """
+    if key not in _OPTIONS:
+        raise KeyError(f'Unknown Plost option: {key}')
+    _OPTIONS[key] = value
+
+
+def get_option(key):
+    """Get the value of a global Plost option. See set_option() for available options."""
+    if key not in _OPTIONS:
+        raise KeyError(f'Unknown Plost option: {key}')
+    return _OPTIONS[key]
+
+
+_SPEC_CACHE = _cache.SpecCache()
+
+
+def clear_cache():
+    """Remove all finished charts from Plost's cache. See the 'cache_max_bytes' option."""
+    _SPEC_CACHE.clear()
+
+
+def _memoize(func):
+    """Reuse the finished spec when a chart function is called again with equivalent arguments.
+
+    DataFrames are compared by a digest of every row rather than kept around. See
+    _cache.fingerprint().
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        args, kwargs = _to_pandas_args(args, kwargs)
+
+        if not _OPTIONS['cache_max_bytes']:
+            return func(*args, **kwargs)
+
+        key = _cache.make_key(func.__name__, args, kwargs, _OPTIONS)
+
+        if key is not None:
+            cached = _SPEC_CACHE.get(key)
+
+            if cached is not None:
+                return _show(*cached)
+
+        token = _cache.current_key.set(key)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _cache.current_key.reset(token)
+
+    return wrapper
+
+
+def _to_pandas_args(args, kwargs):
+    """Convert the data argument of a chart function call to Pandas, if it's Arrow or Polars.
+
+    Only the columns that the other arguments mention are converted.
+    """
+    if args:
+        data, args = args[0], args[1:]
+        columns = _adapters.referenced_columns(args, kwargs)
+        return (_adapters.to_pandas(data, columns), *args), kwargs
+
+    if 'data' in kwargs:
+        kwargs = dict(kwargs)
+        data = kwargs.pop('data')
+        columns = _adapters.referenced_columns((), kwargs)
+        kwargs['data'] = _adapters.to_pandas(data, columns)
+
+    return args, kwargs
+
+
 def _clean_encoding(data, enc, **kwargs):
     if isinstance(enc, str):
         if 'type' in kwargs:
@@ -63,20 +200,13 @@ def _guess_string_encoding_type(data, enc):
     if enc_type:
         return enc_prefix, enc_type
 
-    try:
-        dtype = data[enc].dtype.name
-    except KeyError:
+    types = _schema.infer_types(data)
+
+    if enc not in types:
         # If it's not a column, then maybe it's a value.
         return D(value=enc), None
 
-    if dtype in {'object', 'string', 'bool', 'categorical'}:
-        return enc, 'nominal'
-    elif dtype in {'float64', 'float32', 'int64', 'int32', 'int8', 'string'}:
-        return enc, 'quantitative'
-    elif dtype.startswith('datetime64'):
-        return enc, 'temporal'
-
-    return enc, None
+    return enc, types[enc]
 
 
 VAR_NAME = 'variable' # Singular because it makes tooltips nicer
@@ -86,6 +216,7 @@ VALUE_NAME = 'value' # Singular because it makes tooltips nicer
 def _maybe_melt(data, x, y, legend, *columns_to_keep):
     melted = False
     variable_enc = None
+    transform = []
 
     # We can only melt if you're not passing a complex spec into x or y.
     if isinstance(x, dict) or isinstance(y, dict):
@@ -108,16 +239,32 @@ def _maybe_melt(data, x, y, legend, *columns_to_keep):
         if VALUE_NAME in data.columns:
             raise TypeError(f'Data already contains a column called {VALUE_NAME}')
 
-        data = data.melt(
-            id_vars=id_vars, value_vars=value_vars, var_name=VAR_NAME, value_name=VALUE_NAME)
+        if _OPTIONS['wide_format'] == 'fold':
+            # Keep the data wide, and have Vega-Lite reshape it in the browser.
+            transform.append({'fold': list(value_vars), 'as': [VAR_NAME, VALUE_NAME]})
+            _, value_type = _guess_string_encoding_type(data, value_vars[0])
+            value_enc = D(field=VALUE_NAME, type=value_type, title=None)
+
+        else:
+            data = _reshape.melt(
+                data, id_vars=id_vars, value_vars=value_vars, var_name=VAR_NAME,
+                value_name=VALUE_NAME)
+
+            # Don't show titles in axes since they're no longer the original names and make no
+            # sense to the user.
+            value_enc = _clean_encoding(data, VALUE_NAME, title=None)
 
-        # Don't show titles in axes since they're no longer the original names and make no sense to
-        # the user.
-        value_enc = _clean_encoding(data, VALUE_NAME, title=None)
         variable_enc = D(field=VAR_NAME, title=None, legend=legend)
         melted = True
 
-    return melted, data, value_enc, variable_enc
+    return melted, data, value_enc, variable_enc, transform
+
+
+def _get_folded_columns(transform):
+    for t in transform:
+        if 'fold' in t:
+            return t['fold']
+    return None
 
 
 def _as_list_like(x):
@@ -156,15 +303,26 @@ def _get_legend_dict(legend):
 
 _MINI_CHART_SIZE = 50
 
+# Most points per series to draw in a minimap. It's only a few dozen pixels tall, so more points
+# would just be extra work for the browser.
+_MINIMAP_POINTS = 250
 
-def _add_minimap(orig_spec, encodings, location, filter=False):
-    inner_props = {'mark', 'encoding', 'selection', 'width', 'height'}
+# Name of the dataset holding the minimap's data, when it differs from the main view's.
+_MINIMAP_DATASET = 'minimap'
+
+
+def _add_minimap(orig_spec, encodings, location, filter=False, minimap_data=None):
+    inner_props = {'mark', 'encoding', 'selection', 'transform', 'width', 'height'}
 
     inner_spec = {k: v for (k, v) in orig_spec.items() if k in inner_props}
     outer_spec = {k: v for (k, v) in orig_spec.items() if k not in inner_props}
 
     minimap_spec = copy.deepcopy(inner_spec)
 
+    if minimap_data is not None:
+        outer_spec['datasets'] = {_MINIMAP_DATASET: minimap_data}
+        minimap_spec['data'] = D(name=_MINIMAP_DATASET)
+
     is_2d = False
 
     if len(encodings) == 2:
@@ -203,7 +361,7 @@ def _add_minimap(orig_spec, encodings, location, filter=False):
 
     if filter:
         # Filter data out according to the brush.
-        inner_spec['transform'] = [D(filter=D(selection='brush'))]
+        inner_spec['transform'] = [*inner_spec.get('transform', []), D(filter=D(selection='brush'))]
     else:
         # Change the scale of differen encodings according to the brush.
         for k in encodings:
@@ -225,8 +383,8 @@ def _add_minimap(orig_spec, encodings, location, filter=False):
 def _add_annotations(spec, x_annot, y_annot):
     annotation_layers = []
 
-    _add_encoding_annotations(annotation_layers, 'x', x_annot)
-    _add_encoding_annotations(annotation_layers, 'y', y_annot)
+    _add_encoding_annotations(annotation_layers, spec, 'x', x_annot)
+    _add_encoding_annotations(annotation_layers, spec, 'y', y_annot)
 
     if annotation_layers:
         spec = D(
@@ -239,25 +397,278 @@ def _add_annotations(spec, x_annot, y_annot):
     return spec
 
 
-def _add_encoding_annotations(annotation_layers, encoding, annot):
-    if not annot:
+def _add_encoding_annotations(annotation_layers, spec, encoding, annot):
+    """Add a single rule layer drawing every annotation on one axis.
+
+    The annotations are the rows of a small dataset, so Vega-Lite compiles one layer no matter
+    how many of them there are.
+    """
+    if annot is None:
+        return
+
+    coords, labels = _get_annotation_columns(annot)
+
+    if coords.empty:
         return
 
-    if isinstance(annot, dict):
-        annot_iter = annot.items()
+    # Use the same field name and type as the chart's own encoding, so both layers share a scale
+    # and an axis title.
+    chart_enc = spec.get('encoding', {}).get(encoding)
+    chart_enc = chart_enc if isinstance(chart_enc, dict) else {}
+    coord_name = chart_enc.get('field') or 'coord'
+    coord_type = chart_enc.get('type') or _schema.vega_type(coords.dtype)
+    tooltip_name = _unique_name('tooltip', {coord_name})
+
+    tooltips = labels.astype(str) + ' (' + coords.astype(str) + ')'
+
+    annotation_data = pd.DataFrame({
+        coord_name: coords.to_numpy(),
+        tooltip_name: tooltips.to_numpy(),
+    })
+
+    annotation_layers.append(D(
+        data=annotation_data,
+        mark='rule',
+        encoding={
+            encoding: D(field=coord_name, type=coord_type),
+            "tooltip": D(field=tooltip_name, type='nominal'),
+        },
+    ))
+
+
+def _get_annotation_columns(annot):
+    """Return the coordinates and labels of some annotations, as two Series."""
+    if isinstance(annot, pd.DataFrame):
+        coords = annot.iloc[:, 0].reset_index(drop=True)
+
+        if annot.shape[1] > 1:
+            labels = annot.iloc[:, 1].reset_index(drop=True)
+        else:
+            labels = pd.Series('', index=coords.index)
+
+    elif isinstance(annot, pd.Series):
+        coords = annot.reset_index(drop=True)
+        labels = pd.Series('', index=coords.index)
+
+    elif isinstance(annot, dict):
+        coords = pd.Series(list(annot.keys()))
+        labels = pd.Series(list(annot.values()))
+
     else:
-        annot_iter = ((coord, "") for coord in _as_list_like(annot))
-
-    for coord, label in annot_iter:
-        annotation_layers.append(D(
-            mark='rule',
-            encoding={
-                encoding: D(datum=coord),
-                "tooltip": D(value=f'{label} ({coord})'),
-            },
-        ))
+        coords = pd.Series(list(_as_list_like(annot)))
+        labels = pd.Series('', index=coords.index)
+
+    return coords, labels
+
+
+def _get_column(data, enc):
+    """Return the name of the column enc refers to, or None if enc is not a plain column name."""
+    if not isinstance(enc, str):
+        return None
+
+    enc_prefix, _ = _split_encoding_suffix(enc)
+
+    if enc_prefix in data.columns:
+        return enc_prefix
+
+    return None
+
+
+def _unique_name(name, taken):
+    while name in taken:
+        name = f'{name}_'
+    return name
+
+
+def _use_server_compute(compute, data, supported):
+    if compute == 'client':
+        return False
+
+    if compute == 'server':
+        if not supported:
+            raise ValueError(
+                "compute='server' is not supported for these arguments. Try compute='client'.")
+        return True
+
+    if compute == 'auto':
+        return supported and len(data) > _OPTIONS['server_compute_rows']
+
+    raise ValueError(f'Unknown compute mode: {compute}')
+
+
+def _maybe_downsample(data, x, y_enc, series_enc, max_points, transform=()):
+    if not max_points:
+        return data
+
+    x_col = _get_column(data, x)
+    folded = _get_folded_columns(transform)
+
+    if folded:
+        # Wide-format data: each column is a series. Since they share rows, we keep the union of
+        # the rows picked for each of them.
+        y_cols = folded
+        by = None
+    else:
+        y_cols = [y_enc.get('field') if isinstance(y_enc, dict) else None]
+        by = series_enc.get('field') if isinstance(series_enc, dict) else None
+
+    if x_col is None or not all(c in data.columns for c in y_cols):
+        return data
+
+    if not all(_downsample.can_downsample(data[c]) for c in [x_col, *y_cols]):
+        return data
+
+    if by not in data.columns:
+        by = None
+
+    return _downsample.lttb(data, x_col, y_cols, max_points, by=by)
+
+
+def _slice_x_range(data, x, x_range, x_margin):
+    if x_range is None:
+        return data
+
+    x_col = _get_column(data, x)
+
+    if x_col is None or not _window.can_slice(data[x_col]):
+        raise ValueError('x_range requires x to be a numeric, datetime or timedelta column.')
+
+    start, end = x_range
+    return _window.visible_rows(data, x_col, start, end, x_margin)
+
+
+def _x_range_encoding(data, x, x_range):
+    """Return the x encoding, with its scale limited to x_range."""
+    x_enc = _clean_encoding(data, x)
+
+    if x_range is None:
+        return x_enc
+
+    x_col = _get_column(data, x)
+    scale = dict(x_enc.get('scale') or {})
+
+    if 'domain' in scale or pd.api.types.is_timedelta64_dtype(data[x_col]):
+        return x_enc
+
+    for key, value in zip(['domainMin', 'domainMax'], x_range):
+        value = _window.to_scalar(data[x_col], value)
+
+        if value is None:
+            continue
+
+        if isinstance(value, pd.Timestamp):
+            # Vega-Lite reads numbers as milliseconds since the epoch, in UTC.
+            value = value.value // 1_000_000
+        elif isinstance(value, np.generic):
+            # NumPy scalars, like the result of df.x.min(), aren't JSON-serializable.
+            value = value.item()
+
+        scale.setdefault(key, value)
+
+    x_enc = dict(x_enc)
+    x_enc['scale'] = scale
+    return x_enc
+
+
+def _get_field(data, enc):
+    """Return the column an encoding dict reads from, or None."""
+    if isinstance(enc, dict) and enc.get('field') in data.columns:
+        return enc['field']
+    return None
+
+
+def _downsample_for_minimap(data, x, y_enc, series_enc, transform):
+    minimap_data = _maybe_downsample(data, x, y_enc, series_enc, _MINIMAP_POINTS, transform)
+
+    if minimap_data is data:
+        return None
+
+    return minimap_data
+
+
+def _decimate_for_minimap(data, series_enc):
+    minimap_data = _downsample.decimate(data, _MINIMAP_POINTS, by=_get_field(data, series_enc))
 
+    if minimap_data is data:
+        return None
+
+    return minimap_data
+
+
+def _sum_for_minimap(data, value_enc, *encs):
+    value_col = _get_field(data, value_enc)
+
+    if value_col is None or 'aggregate' in value_enc:
+        return None
+
+    if not pd.api.types.is_numeric_dtype(data[value_col]):
+        return None
+
+    keys = []
+
+    for enc in encs:
+        key = _get_field(data, enc)
+        if enc is not value_enc and key is not None and key not in keys:
+            keys.append(key)
+
+    if not keys:
+        return None
+
+    minimap_data = _aggregate.sum_by(data, keys, value_col)
+
+    if len(minimap_data) == len(data):
+        return None
+
+    return minimap_data
+
+
+def _draw(spec, use_container_width, live=None):
+    """Send the chart to Streamlit.
+
+    If live is a _live.LivePlan, returns a LiveChart that can receive new rows. Otherwise returns
+    None.
+    """
+    spec = _transport.name_datasets(spec)
+
+    if _OPTIONS['project_columns']:
+        spec = _transport.project_columns(spec)
+
+    # Conversions applied to the datasets' columns, so live charts can apply them to new rows.
+    encoders = {}
+
+    if _OPTIONS['epoch_dates']:
+        spec = _transport.encode_dates(spec, encoders)
+
+    if _OPTIONS['dictionary_encode']:
+        spec = _transport.encode_dictionaries(spec, encoders)
+
+    if _OPTIONS['quantize']:
+        spec = _transport.quantize(spec, encoders, live=live is not None)
+
+    key = _cache.current_key.get()
 
+    if key is not None:
+        _SPEC_CACHE.put(
+            key,
+            (spec, use_container_width, live, encoders),
+            _cache.spec_nbytes(spec),
+            _OPTIONS['cache_max_bytes'],
+        )
+
+    return _show(spec, use_container_width, live, encoders)
+
+
+def _show(spec, use_container_width, live=None, encoders=None):
+    # Copy so Streamlit can pop data out of the spec without affecting the cached one.
+    element = st.vega_lite_chart(dict(spec), use_container_width=use_container_width)
+
+    if live is None:
+        return None
+
+    return _live.LiveChart(element, spec, use_container_width, live, encoders)
+
+
+@_memoize
 def line_chart(
         data,
         x,
@@ -272,12 +683,15 @@ def line_chart(
         legend='bottom',
         pan_zoom='both',
         use_container_width=True,
+        max_points=None,
+        x_range=None,
+        x_margin=0,
     ):
     """Draw a line chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     x : str or dict
         Column name to use for the x axis, or Vega-Lite dict for the x encoding.
         See https://vega.github.io/vega-lite/docs/encoding.html#position-datum-def.
@@ -301,16 +715,22 @@ def line_chart(
         None means the default opacity (1.0) will be used.
         Also supports Altair-style shorthands, like "foo:T" for temporal. See
         https://altair-viz.github.io/user_guide/encoding.html#encoding-data-types.
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -330,13 +750,36 @@ def line_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    max_points : int or None
+        If set, series with more points than this are downsampled with the
+        Largest-Triangle-Three-Buckets algorithm before being sent to the browser. This keeps the
+        shape of each line while capping the amount of data to draw. Series are split by the
+        color parameter, or by column when y is a list.
+        None means every point will be drawn.
+    x_range : tuple or None
+        Pair (start, end) with the part of the x axis to show, where either end may be None for
+        no limit. Only the rows in that range are sent to the browser, which is much cheaper for
+        long histories. If x is sorted, the rows are found by binary search rather than by
+        checking every row. Requires x to be a numeric, datetime or timedelta column.
+        None means every row will be sent.
+    x_margin : number
+        Also send the rows this far outside of x_range, as a fraction of its width, so there is
+        something to see when panning a little. For example, 0.1 adds 10% on each side.
+
+    Returns
+    -------
+    LiveChart
+        Handle to the chart. Call its add_rows() method to append new rows to the chart.
     """
     legend = _get_legend_dict(legend)
-    melted, data, y_enc, color_enc = _maybe_melt(data, x, y, legend, opacity)
+    data = _slice_x_range(data, x, x_range, x_margin)
+    melted, data, y_enc, color_enc, transform = _maybe_melt(data, x, y, legend, opacity)
 
     if color:
         color_enc = _clean_encoding(data, color, legend=legend)
 
+    data = _maybe_downsample(data, x, y_enc, color_enc, max_points, transform)
+
     meta = D(
         data=data,
         width=width,
@@ -347,7 +790,7 @@ def line_chart(
     spec = D(
         mark=D(type='line', tooltip=True),
         encoding=D(
-            x=_clean_encoding(data, x),
+            x=_x_range_encoding(data, x, x_range),
             y=y_enc,
             color=color_enc,
             opacity=_clean_encoding(data, opacity),
@@ -355,15 +798,24 @@ def line_chart(
         selection=_get_selection(pan_zoom),
     )
 
+    if transform:
+        spec['transform'] = transform
+
     spec = _add_annotations(spec, x_annot, y_annot)
     spec.update(meta)
 
     if pan_zoom == 'minimap':
-        spec = _add_minimap(spec, ['x'], 'bottom')
+        minimap_data = _downsample_for_minimap(data, x, y_enc, color_enc, transform)
+        spec = _add_minimap(spec, ['x'], 'bottom', minimap_data=minimap_data)
+
+    def reshape(rows):
+        return _maybe_melt(rows, x, y, legend, opacity)[1]
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    live = _live.LivePlan(reshape, x=_get_column(data, x), series=_get_field(data, color_enc))
+    return _draw(spec, use_container_width, live)
 
 
+@_memoize
 def area_chart(
         data,
         x,
@@ -379,12 +831,15 @@ def area_chart(
         legend='bottom',
         pan_zoom='both',
         use_container_width=True,
+        max_points=None,
+        x_range=None,
+        x_margin=0,
     ):
     """Draw an area chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     x : str or dict
         Column name to use for the x axis, or Vega-Lite dict for the x encoding.
         See https://vega.github.io/vega-lite/docs/encoding.html#position-datum-def.
@@ -412,16 +867,22 @@ def area_chart(
     stack : bool or str
         True means areas of different colors will be stacked. False means there will be no
         stacking, A Vega-Lite stack spec like 'normalized' is also accepted.
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -441,13 +902,36 @@ def area_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    max_points : int or None
+        If set, series with more points than this are downsampled with the
+        Largest-Triangle-Three-Buckets algorithm before being sent to the browser. This keeps the
+        shape of each line while capping the amount of data to draw. Series are split by the
+        color parameter, or by column when y is a list.
+        None means every point will be drawn.
+    x_range : tuple or None
+        Pair (start, end) with the part of the x axis to show, where either end may be None for
+        no limit. Only the rows in that range are sent to the browser, which is much cheaper for
+        long histories. If x is sorted, the rows are found by binary search rather than by
+        checking every row. Requires x to be a numeric, datetime or timedelta column.
+        None means every row will be sent.
+    x_margin : number
+        Also send the rows this far outside of x_range, as a fraction of its width, so there is
+        something to see when panning a little. For example, 0.1 adds 10% on each side.
+
+    Returns
+    -------
+    LiveChart
+        Handle to the chart. Call its add_rows() method to append new rows to the chart.
     """
     legend = _get_legend_dict(legend)
-    melted, data, y_enc, color_enc = _maybe_melt(data, x, y, legend, opacity)
+    data = _slice_x_range(data, x, x_range, x_margin)
+    melted, data, y_enc, color_enc, transform = _maybe_melt(data, x, y, legend, opacity)
 
     if color:
         color_enc = _clean_encoding(data, color, legend=legend)
 
+    data = _maybe_downsample(data, x, y_enc, color_enc, max_points, transform)
+
     if stack is not None:
         if stack is True:
             y_enc['stack'] = 'zero'
@@ -464,7 +948,7 @@ def area_chart(
     spec = D(
         mark=D(type='area', tooltip=True),
         encoding=D(
-            x=_clean_encoding(data, x),
+            x=_x_range_encoding(data, x, x_range),
             y=y_enc,
             color=color_enc,
             opacity=_clean_encoding(data, opacity),
@@ -472,15 +956,24 @@ def area_chart(
         selection=_get_selection(pan_zoom),
     )
 
+    if transform:
+        spec['transform'] = transform
+
     spec = _add_annotations(spec, x_annot, y_annot)
     spec.update(meta)
 
     if pan_zoom == 'minimap':
-        spec = _add_minimap(spec, ['x'], 'bottom')
+        minimap_data = _downsample_for_minimap(data, x, y_enc, color_enc, transform)
+        spec = _add_minimap(spec, ['x'], 'bottom', minimap_data=minimap_data)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    def reshape(rows):
+        return _maybe_melt(rows, x, y, legend, opacity)[1]
 
+    live = _live.LivePlan(reshape, x=_get_column(data, x), series=_get_field(data, color_enc))
+    return _draw(spec, use_container_width, live)
 
+
+@_memoize
 def bar_chart(
         data,
         bar,
@@ -496,12 +989,14 @@ def bar_chart(
         legend='bottom',
         pan_zoom=None,
         use_container_width=False,
+        top_k=None,
+        other_label='Other',
     ):
     """Draw a bar chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     bar : str or dict
         Column name to use for the domain axis, or Vega-Lite dict for x/y encoding.
     value : str or list of str or dict
@@ -543,15 +1038,29 @@ def bar_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    top_k : int or None
+        If set, only draws bars for the top_k values of the bar column with the largest totals,
+        largest first, and merges all others into a single bar labeled other_label. Values are
+        summed in Python for each bar and series (color, group, etc.), so at most top_k + 1
+        bars per series are sent to the browser. Requires bar to be a column name and the
+        values to be numeric.
+    other_label : str
+        Label of the bar holding the values merged by top_k.
     """
     x_enc = _clean_encoding(data, bar, title=None)
     legend = _get_legend_dict(legend)
-    melted, data, y_enc, color_enc = _maybe_melt(data, bar, value, legend, opacity)
+    melted, data, y_enc, color_enc, transform = _maybe_melt(data, bar, value, legend, opacity)
 
     if color:
         if color == 'value': # 'value', as in the value= arg.
-            color = VAR_NAME
-        color_enc = _clean_encoding(data, color, legend=legend)
+            # Not using _clean_encoding since the column may only exist after a fold transform.
+            color_enc = D(field=VAR_NAME, type='nominal', legend=legend)
+        else:
+            color_enc = _clean_encoding(data, color, legend=legend)
+
+    if top_k is not None:
+        data = _top_k_bars(
+            data, bar, x_enc, y_enc, transform, top_k, other_label, color_enc, opacity, group)
 
     column_enc = None
     row_enc = None
@@ -564,8 +1073,9 @@ def bar_chart(
             x_enc = color_enc
         else:
             if group == 'value': # 'value', as in the value= arg.
-                group = VAR_NAME
-            column_enc = _clean_encoding(data, group, title=None)
+                column_enc = D(field=VAR_NAME, type='nominal', title=None)
+            else:
+                column_enc = _clean_encoding(data, group, title=None)
 
         column_enc['spacing'] = 10
 
@@ -581,6 +1091,8 @@ def bar_chart(
         row_enc, column_enc = column_enc, row_enc
         use_container_width = True
 
+    opacity_enc = _clean_encoding(data, opacity)
+
     meta = D(
         data=data,
         width=width,
@@ -594,27 +1106,68 @@ def bar_chart(
             x=x_enc,
             y=y_enc,
             color=color_enc,
-            opacity=_clean_encoding(data, opacity),
+            opacity=opacity_enc,
             column=column_enc,
             row=row_enc,
         ),
     )
 
+    if transform:
+        spec['transform'] = transform
+
     spec.update(meta)
 
     if pan_zoom == 'minimap':
         if direction == 'horizontal':
             enc = ['y']
             loc = 'right'
+            value_enc = x_enc
         else:
             enc = ['x']
             loc = 'top'
+            value_enc = y_enc
+
+        # The minimap only needs one bar per category, so pre-aggregate it.
+        minimap_data = _sum_for_minimap(
+            data, value_enc, x_enc, y_enc, color_enc, opacity_enc, column_enc, row_enc)
+
+        spec = _add_minimap(spec, enc, loc, filter=True, minimap_data=minimap_data)
 
-        spec = _add_minimap(spec, enc, loc, filter=True)
+    _draw(spec, use_container_width)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
 
+def _top_k_bars(data, bar, bar_enc, value_enc, transform, top_k, other_label, color_enc, opacity,
+                group):
+    """Keep the top_k bars, fold the rest into other_label, and sort bar_enc accordingly."""
+    bar_col = _get_column(data, bar)
+    value_cols = _get_folded_columns(transform) or [_get_field(data, value_enc)]
 
+    if bar_col is None or None in value_cols:
+        raise ValueError('top_k requires bar and value to be column names.')
+
+    if not all(pd.api.types.is_numeric_dtype(data[c]) for c in value_cols):
+        raise ValueError('top_k requires value to be numeric.')
+
+    group_col = VAR_NAME if group in {True, 'value'} else _get_column(data, group)
+    series_cols = [_get_field(data, color_enc), _get_column(data, opacity), group_col]
+
+    by = []
+    for c in series_cols:
+        if c is not None and c in data.columns and c != bar_col and c not in by:
+            by.append(c)
+
+    keep = _aggregate.top_keys(data, bar_col, value_cols, top_k)
+    data, order = _aggregate.fold_others(data, bar_col, value_cols, by, keep, other_label)
+
+    bar_enc['sort'] = order
+
+    if bar_enc.get('type') not in {'nominal', 'ordinal'}:
+        bar_enc['type'] = 'nominal'
+
+    return data
+
+
+@_memoize
 def scatter_chart(
         data,
         x,
@@ -630,12 +1183,14 @@ def scatter_chart(
         legend='right',
         pan_zoom='both',
         use_container_width=True,
+        density=None,
+        max_points=None,
     ):
     """Draw a scatter-plot chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     x : str or dict
         Column name to use for the x axis, or Vega-Lite dict for the x encoding.
         See https://vega.github.io/vega-lite/docs/encoding.html#position-datum-def.
@@ -666,16 +1221,22 @@ def scatter_chart(
         None means the default opacity (1.0) will be used.
         Also supports Altair-style shorthands, like "foo:T" for temporal. See
         https://altair-viz.github.io/user_guide/encoding.html#encoding-data-types.
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -695,9 +1256,42 @@ def scatter_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    density : str or None
+        Draw a heatmap of how many points fall in each region of the chart, rather than one
+        mark per point. The counts are calculated in Python, so the browser only receives one
+        row per cell no matter how large the data is. Allowed values:
+            - None: always draw points.
+            - 'rect': always draw a heatmap of rectangular cells a few pixels wide.
+            - 'hex': always draw a heatmap of hexagonal cells. Hexagons are a fixed number of
+              pixels wide, so they only tile at the size they were binned for. The chart is
+              drawn at exactly width x height (600x300 if not set), ignoring
+              use_container_width, and can't be panned or zoomed.
+            - 'auto': draw points, unless there are more than max_points of them, in which case
+              draw a 'rect' heatmap.
+        Cells are colored by count. If color or size is a column, cells are colored by its mean
+        instead, or by its most common value for non-numeric columns (in which case the opacity
+        shows the count). Requires x and y to be different numeric columns.
+    max_points : int or None
+        Number of points above which density='auto' draws a heatmap. None means the
+        'server_compute_rows' option will be used. See set_option().
+
+    Returns
+    -------
+    LiveChart or None
+        Handle to the chart. Call its add_rows() method to append new rows to the chart.
+        None if the chart is drawn as a density heatmap.
     """
     legend = _get_legend_dict(legend)
-    melted, data, y_enc, color_enc = _maybe_melt(data, x, y, legend, size, opacity)
+
+    density = _use_density(density, data, x, y, max_points)
+
+    if density:
+        _density_chart(
+            data, x, y, color, size, density, x_annot, y_annot, width, height, title, legend,
+            pan_zoom, use_container_width)
+        return None
+    melted, data, y_enc, color_enc, transform = _maybe_melt(
+        data, x, y, legend, size, opacity)
 
     meta = D(
         data=data,
@@ -718,13 +1312,53 @@ def scatter_chart(
         selection=_get_selection(pan_zoom),
     )
 
+    if transform:
+        spec['transform'] = transform
+
+    spec = _add_annotations(spec, x_annot, y_annot)
+    spec.update(meta)
+
+    if pan_zoom == 'minimap':
+        minimap_data = _decimate_for_minimap(data, color_enc)
+        spec = _add_minimap(spec, ['x', 'y'], 'bottom', minimap_data=minimap_data)
+
+    def reshape(rows):
+        return _maybe_melt(rows, x, y, legend, size, opacity)[1]
+
+    live = _live.LivePlan(reshape, x=_get_column(data, x), series=_get_field(data, color_enc))
+    return _draw(spec, use_container_width, live)
+
+
+def _density_chart(
+        data, x, y, color, size, density, x_annot, y_annot, width, height, title, legend,
+        pan_zoom, use_container_width):
+    value = color if _get_column(data, color) is not None else size
+    spec = _density_on_server(data, x, y, value, density, width, height, legend)
+    binned_data = spec.pop('data')
+
+    if density == 'hex':
+        # Resizing or zooming would stretch the grid, but not the hexagons drawn on it.
+        width = spec.pop('width')
+        height = spec.pop('height')
+        pan_zoom = None
+        use_container_width = False
+
+    meta = D(
+        data=binned_data,
+        width=width,
+        height=height,
+        title=title,
+    )
+
+    spec['selection'] = _get_selection(pan_zoom)
+
     spec = _add_annotations(spec, x_annot, y_annot)
     spec.update(meta)
 
     if pan_zoom == 'minimap':
         spec = _add_minimap(spec, ['x', 'y'], 'bottom')
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    _draw(spec, use_container_width)
 
 
 def _pie_spec(
@@ -743,6 +1377,40 @@ def _pie_spec(
     )
 
 
+def _sum_slices(data, theta, color, fold_below, other_label):
+    """Sum theta for each color, so only one row per slice is sent to the browser.
+
+    Returns
+    -------
+    tuple of (data, order)
+        Where order is the list of colors to sort the slices by, or None to keep the default.
+    """
+    theta_col = _get_column(data, theta)
+    color_col = _get_column(data, color)
+
+    if theta_col is None or color_col is None or theta_col == color_col:
+        return data, None
+
+    if not pd.api.types.is_numeric_dtype(data[theta_col]):
+        return data, None
+
+    totals = _aggregate.sum_by(data, [color_col], theta_col)
+
+    if not fold_below:
+        return totals, None
+
+    values = totals[theta_col]
+    is_small = values < fold_below * values.sum()
+
+    if not is_small.any():
+        return totals, None
+
+    # Largest slices first, and the merged one last.
+    keep = totals[~is_small].sort_values(theta_col, ascending=False)[color_col].tolist()
+    return _aggregate.fold_others(totals, color_col, [theta_col], [], keep, other_label)
+
+
+@_memoize
 def pie_chart(
         data,
         theta,
@@ -752,12 +1420,14 @@ def pie_chart(
         title=None,
         legend='right',
         use_container_width=True,
+        fold_below=None,
+        other_label='Other',
     ):
     """Draw a pie chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     theta : str or dict
         Column name to use for the angle of the pie slices, or Vega-Lite dict for the theta
         encoding.
@@ -777,8 +1447,15 @@ def pie_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    fold_below : float or None
+        Slices smaller than this fraction of the whole (e.g. 0.02 for 2%) are merged into a single
+        slice labeled other_label. None means no slices are merged.
+    other_label : str
+        Label of the slice holding the slices merged by fold_below.
     """
 
+    data, order = _sum_slices(data, theta, color, fold_below, other_label)
+
     meta = D(
         data=data,
         width=width,
@@ -793,11 +1470,15 @@ def pie_chart(
         legend,
     )
 
+    if order is not None:
+        spec['encoding']['color']['sort'] = order
+
     spec.update(meta)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    _draw(spec, use_container_width)
 
 
+@_memoize
 def donut_chart(
         data,
         theta,
@@ -807,12 +1488,14 @@ def donut_chart(
         title=None,
         legend='right',
         use_container_width=True,
+        fold_below=None,
+        other_label='Other',
     ):
     """Draw a donut chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     theta : str or dict
         Column name to use for the angle of the pie slices, or Vega-Lite dict for the theta
         encoding.
@@ -832,8 +1515,15 @@ def donut_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    fold_below : float or None
+        Slices smaller than this fraction of the whole (e.g. 0.02 for 2%) are merged into a single
+        slice labeled other_label. None means no slices are merged.
+    other_label : str
+        Label of the slice holding the slices merged by fold_below.
     """
 
+    data, order = _sum_slices(data, theta, color, fold_below, other_label)
+
     meta = D(
         data=data,
         width=width,
@@ -848,6 +1538,9 @@ def donut_chart(
         legend,
     )
 
+    if order is not None:
+        spec['encoding']['color']['sort'] = order
+
     if height:
         innerRadius = height // 4
     else:
@@ -857,9 +1550,10 @@ def donut_chart(
 
     spec.update(meta)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    _draw(spec, use_container_width)
 
 
+@_memoize
 def event_chart(
         data,
         x,
@@ -876,12 +1570,16 @@ def event_chart(
         legend='bottom',
         pan_zoom='both',
         use_container_width=True,
+        density=None,
+        max_points=None,
+        x_range=None,
+        x_margin=0,
     ):
     """Draw an event chart.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     x : str or dict
         Column name to use for the x axis, or Vega-Lite dict for the x encoding.
         See https://vega.github.io/vega-lite/docs/encoding.html#position-datum-def.
@@ -913,16 +1611,22 @@ def event_chart(
         https://altair-viz.github.io/user_guide/encoding.html#encoding-data-types.
     thickness : number or str or dict
         The thickness of the tick marks in the chart.
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -942,9 +1646,44 @@ def event_chart(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    density : str or None
+        Merge events that are too close together to tell apart, so drawing the chart takes the
+        same time no matter how many events there are. Allowed values:
+            - None: draw one tick per event.
+            - 'bucket': split the x axis into slices a couple of pixels wide, and draw one tick
+              per slice for each y value (and color), at the mean position of its events. The
+              number of events in each tick is shown with its opacity. Slices holding a single
+              event keep its exact position.
+            - 'auto': same as 'bucket' if there are more than max_points events, else None.
+        Requires x to be a numeric or datetime column, and y to be a column. Not supported when
+        size or opacity are columns.
+    max_points : int or None
+        Number of events above which density='auto' merges them. None means the
+        'server_compute_rows' option will be used. See set_option().
+    x_range : tuple or None
+        Pair (start, end) with the part of the x axis to show, where either end may be None for
+        no limit. Only the rows in that range are sent to the browser, which is much cheaper for
+        long histories. If x is sorted, the rows are found by binary search rather than by
+        checking every row. Requires x to be a numeric, datetime or timedelta column.
+        None means every row will be sent.
+    x_margin : number
+        Also send the rows this far outside of x_range, as a fraction of its width, so there is
+        something to see when panning a little. For example, 0.1 adds 10% on each side.
+
+    Returns
+    -------
+    LiveChart or None
+        Handle to the chart. Call its add_rows() method to append new rows to the chart.
+        None if events were merged because of the density parameter.
     """
 
     legend = _get_legend_dict(legend)
+    data = _slice_x_range(data, x, x_range, x_margin)
+    density = _use_event_density(density, data, x, y, size, opacity, max_points)
+    opacity_enc = _clean_encoding(data, opacity, legend=legend)
+
+    if density:
+        data, opacity_enc = _bucket_events(data, x, y, color, width)
 
     meta = D(
         data=data,
@@ -953,14 +1692,16 @@ def event_chart(
         title=title,
     )
 
+    y_enc = _clean_encoding(data, y)
+
     spec = D(
         mark=D(type='tick', tooltip=True, thickness=thickness),
         encoding=D(
-            x=_clean_encoding(data, x),
-            y=_clean_encoding(data, y),
+            x=_x_range_encoding(data, x, x_range),
+            y=y_enc,
             color=_clean_encoding(data, color, legend=legend),
             size=_clean_encoding(data, size, legend=legend),
-            opacity=_clean_encoding(data, opacity, legend=legend),
+            opacity=opacity_enc,
         ),
         selection=_get_selection(pan_zoom),
     )
@@ -969,11 +1710,75 @@ def event_chart(
     spec.update(meta)
 
     if pan_zoom == 'minimap':
-        spec = _add_minimap(spec, ['x'], 'bottom')
+        minimap_data = _decimate_for_minimap(data, y_enc)
+        spec = _add_minimap(spec, ['x'], 'bottom', minimap_data=minimap_data)
+
+    if density:
+        _draw(spec, use_container_width)
+        return None
+
+    live = _live.LivePlan(None, x=_get_column(data, x), series=_get_field(data, y_enc))
+    return _draw(spec, use_container_width, live)
+
+
+# Width of the slices of the x axis that event_chart(density='bucket') merges events in, in pixels.
+_EVENT_BUCKET_PIXELS = 2
+
+# Opacity of the ticks holding the fewest and the most events, with density='bucket'.
+_EVENT_OPACITY_RANGE = [0.25, 1]
+
+
+def _use_event_density(density, data, x, y, size, opacity, max_points):
+    if density is None:
+        return None
+
+    x_col = _get_column(data, x)
+
+    supported = (
+        x_col is not None
+        and _get_column(data, y) is not None
+        and _get_column(data, size) is None
+        and _get_column(data, opacity) is None
+        and _downsample.can_downsample(data[x_col]))
+
+    if density == 'auto':
+        threshold = _OPTIONS['server_compute_rows'] if max_points is None else max_points
+        return 'bucket' if supported and len(data) > threshold else None
+
+    if density == 'bucket':
+        if not supported:
+            raise ValueError(
+                "density='bucket' requires x to be a numeric or datetime column, y to be a "
+                "column, and size and opacity not to be columns.")
+        return density
+
+    raise ValueError(f'Unknown density mode: {density}')
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
 
+def _bucket_events(data, x, y, color, width):
+    x_col = _get_column(data, x)
+    by = [_get_column(data, y)]
 
+    color_col = _get_column(data, color)
+    if color_col is not None and color_col not in by:
+        by.append(color_col)
+
+    count_name = _unique_name('count', {x_col, *by})
+    num_buckets = max(1, (width or _DENSITY_DEFAULT_WIDTH) // _EVENT_BUCKET_PIXELS)
+    bucketed = _downsample.bucket(data, x_col, by, num_buckets, count_name)
+
+    opacity_enc = D(
+        field=count_name,
+        type='quantitative',
+        title=_aggregate.title('count', None),
+        scale=D(type='log', range=_EVENT_OPACITY_RANGE),
+        legend=None,
+    )
+
+    return bucketed, opacity_enc
+
+
+@_memoize
 def time_hist(
         data,
         date,
@@ -989,12 +1794,13 @@ def time_hist(
         legend='bottom',
         pan_zoom=None,
         use_container_width=True,
+        compute='auto',
     ):
     """Calculate and draw a time histogram.
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
     date: str
         Column name to use for the date.
     x_unit : str
@@ -1016,16 +1822,22 @@ def time_hist(
         Common operations are 'count', 'distinct', 'sum', 'mean', 'median', 'max', 'min',
         'valid', and 'missing'.
         See https://vega.github.io/vega-lite/docs/aggregate.html#ops.
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -1045,8 +1857,47 @@ def time_hist(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    compute : str
+        Where to calculate the histogram. Allowed values:
+            - 'client': send every row to the browser and let Vega-Lite apply the time units
+              and aggregate them.
+            - 'server': truncate the dates to x_unit and y_unit and aggregate them in Python, and
+              only send the non-empty cells to the browser. Requires date to be a datetime column,
+              and the aggregate to be one of 'count', 'sum', 'mean', 'min', 'max', 'median',
+              'distinct', 'valid', 'stdev' or 'variance'.
+            - 'auto': same as 'server' when possible and the data has more rows than the
+              'server_compute_rows' option. Otherwise, same as 'client'.
     """
 
+    on_server = _use_server_compute(
+        compute,
+        data,
+        _can_time_bin_on_server(data, date, x_unit, y_unit)
+        and _can_aggregate_on_server(data, color, aggregate),
+    )
+
+    if on_server:
+        # The binned columns get new names, so title them the way Vega-Lite titles the date
+        # column. Otherwise tooltips would change once the data gets big enough.
+        date_col = _get_column(data, date)
+        x_title = _aggregate.time_unit_title(date_col, x_unit)
+        y_title = _aggregate.time_unit_title(date_col, y_unit)
+
+        data, x_field, y_field, color_enc = _time_hist_on_server(
+            data, date, x_unit, y_unit, color, aggregate)
+        color_enc['legend'] = legend
+
+        # The floored dates hold wall-clock times, and the browser reads them as UTC. So extract
+        # their parts in UTC too, or browsers west of UTC would shift every cell.
+        x_unit = _utc_time_unit(x_unit)
+        y_unit = _utc_time_unit(y_unit)
+    else:
+        x_field = date
+        y_field = date
+        x_title = None
+        y_title = None
+        color_enc = _clean_encoding(data, color, aggregate=aggregate, legend=legend)
+
     meta = D(
         data=data,
         width=width,
@@ -1057,9 +1908,11 @@ def time_hist(
     spec = D(
         mark=D(type='rect', tooltip=True),
         encoding=D(
-            x=D(field=date, type='ordinal', timeUnit=x_unit, title=None, axis=D(tickBand='extent')),
-            y=D(field=date, type='ordinal', timeUnit=y_unit, title=None, axis=D(tickBand='extent')),
-            color=_clean_encoding(data, color, aggregate=aggregate, legend=legend)
+            x=D(field=x_field, type='ordinal', timeUnit=x_unit, title=x_title,
+                axis=D(tickBand='extent', title=None)),
+            y=D(field=y_field, type='ordinal', timeUnit=y_unit, title=y_title,
+                axis=D(tickBand='extent', title=None)),
+            color=color_enc,
         ),
         selection=_get_selection(pan_zoom),
     )
@@ -1067,9 +1920,10 @@ def time_hist(
     spec = _add_annotations(spec, x_annot, y_annot)
     spec.update(meta)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    _draw(spec, use_container_width)
 
 
+@_memoize
 def xy_hist(
         data,
         x,
@@ -1086,6 +1940,7 @@ def xy_hist(
         legend='bottom',
         pan_zoom=None,
         use_container_width=True,
+        compute='auto',
     ):
     """Calculate and draw an x-y histogram (i.e. 2D histogram).
 
@@ -1125,16 +1980,22 @@ def xy_hist(
         Allows you to customize the binning properties for the y axis.
         If None, uses the default binning properties.
         See https://vega.github.io/vega-lite/docs/bin.html#bin-parameters>
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -1154,8 +2015,36 @@ def xy_hist(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    compute : str
+        Where to calculate the histogram. Allowed values:
+            - 'client': send every row to the browser and let Vega-Lite bin and aggregate them.
+            - 'server': bin and aggregate in Python, and only send the non-empty cells to the
+              browser. Requires x and y to be numeric columns, and the aggregate to be one of
+              'count', 'sum', 'mean', 'min', 'max', 'median', 'distinct', 'valid', 'stdev' or
+              'variance'.
+            - 'auto': same as 'server' when possible and the data has more rows than the
+              'server_compute_rows' option. Otherwise, same as 'client'.
     """
 
+    on_server = _use_server_compute(
+        compute,
+        data,
+        _can_bin_on_server(data, x, x_bin)
+        and _can_bin_on_server(data, y, y_bin)
+        and _can_aggregate_on_server(data, color, aggregate),
+    )
+
+    if on_server:
+        data, x_enc, x2_enc, y_enc, y2_enc, color_enc = _xy_hist_on_server(
+            data, x, y, color, aggregate, x_bin, y_bin)
+        color_enc['legend'] = legend
+    else:
+        x_enc = _clean_encoding(data, x, bin=x_bin)
+        x2_enc = None
+        y_enc = _clean_encoding(data, y, bin=y_bin)
+        y2_enc = None
+        color_enc = _clean_encoding(data, color, aggregate=aggregate, legend=legend)
+
     meta = D(
         data=data,
         width=width,
@@ -1166,9 +2055,11 @@ def xy_hist(
     spec = D(
         mark=D(type='rect', tooltip=True),
         encoding=D(
-            x=_clean_encoding(data, x, bin=x_bin),
-            y=_clean_encoding(data, y, bin=y_bin),
-            color=_clean_encoding(data, color, aggregate=aggregate, legend=legend)
+            x=x_enc,
+            x2=x2_enc,
+            y=y_enc,
+            y2=y2_enc,
+            color=color_enc,
         ),
         selection=_get_selection(pan_zoom),
     )
@@ -1176,9 +2067,400 @@ def xy_hist(
     spec = _add_annotations(spec, x_annot, y_annot)
     spec.update(meta)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    _draw(spec, use_container_width)
+
+
+def _can_bin_on_server(data, enc, bin):
+    column = _get_column(data, enc)
+
+    if column is None or _split_encoding_suffix(enc)[1] not in {None, 'quantitative'}:
+        return False
+
+    return _aggregate.can_bin(bin) and _aggregate.is_binnable(data[column])
+
+
+def _can_aggregate_on_server(data, enc, aggregate):
+    if aggregate not in _aggregate.SUPPORTED_OPS:
+        return False
+
+    if enc is None:
+        return aggregate == 'count'
+
+    column = _get_column(data, enc)
+
+    if column is None:
+        return False
+
+    if aggregate in _aggregate.NON_NUMERIC_OPS:
+        return True
+
+    return pd.api.types.is_numeric_dtype(data[column])
+
+
+def _binned_encodings(column, step, **kwargs):
+    start_enc = D(
+        field=column,
+        type='quantitative',
+        bin=D(binned=True, step=step),
+        title=f'{column} (binned)',
+    )
+    start_enc.update(kwargs)
+    end_enc = D(field=f'{column}_end')
+    return start_enc, end_enc
+
+
+def _hist_on_server(data, x, y, aggregate, bin):
+    x_col = _get_column(data, x)
+    y_col = _get_column(data, y)
+
+    x_values = data[x_col].to_numpy()
+    start, stop, step = _aggregate.bin_params(bin, x_values)
+    index, num_bins = _aggregate.bin_index(x_values, start, stop, step)
+
+    y_values = None if y_col is None else data[y_col].to_numpy()
+    bins, result = _aggregate.reduce_nonempty(index, num_bins, y_values, aggregate)
+
+    starts = start + step * bins
+    x_enc, x2_enc = _binned_encodings(x_col, step)
+
+    value_name = 'count' if aggregate == 'count' else y_col
+    value_name = _unique_name(value_name, {x_col, x2_enc['field']})
+    y_enc = D(
+        field=value_name,
+        type='quantitative',
+        title=_aggregate.title(aggregate, y_col),
+    )
+
+    binned_data = pd.DataFrame({
+        x_col: starts,
+        x2_enc['field']: starts + step,
+        value_name: result,
+    })
+
+    return binned_data, x_enc, x2_enc, y_enc
+
+
+def _can_time_bin_on_server(data, date, x_unit, y_unit):
+    column = _get_column(data, date)
+
+    if column is None or not pd.api.types.is_datetime64_any_dtype(data[column]):
+        return False
+
+    return (
+        _aggregate.parse_time_unit(x_unit) is not None
+        and _aggregate.parse_time_unit(y_unit) is not None)
+
+
+def _utc_time_unit(unit):
+    return unit if unit.startswith('utc') else f'utc{unit}'
+
+
+def _time_hist_on_server(data, date, x_unit, y_unit, color, aggregate):
+    date_col = _get_column(data, date)
+    color_col = _get_column(data, color)
+
+    data = data[data[date_col].notna()]
+    dates = data[date_col]
+
+    x_codes, x_uniques = pd.factorize(_aggregate.time_unit_floor(dates, x_unit))
+    y_codes, y_uniques = pd.factorize(_aggregate.time_unit_floor(dates, y_unit))
+    index = x_codes * len(y_uniques) + y_codes
+
+    color_values = None if color_col is None else data[color_col].to_numpy()
+    cells, result = _aggregate.reduce_nonempty(
+        index, len(x_uniques) * len(y_uniques), color_values, aggregate)
+
+    x_cells, y_cells = np.divmod(cells, len(y_uniques))
+
+    x_name = f'{date_col}_{x_unit}'
+    y_name = _unique_name(f'{date_col}_{y_unit}', {x_name})
+
+    value_name = 'count' if aggregate == 'count' else color_col
+    value_name = _unique_name(value_name, {x_name, y_name})
+    color_enc = D(
+        field=value_name,
+        type='quantitative',
+        title=_aggregate.title(aggregate, color_col),
+    )
+
+    binned_data = pd.DataFrame({
+        x_name: x_uniques[x_cells],
+        y_name: y_uniques[y_cells],
+        value_name: result,
+    })
+
+    return binned_data, x_name, y_name, color_enc
+
+
+def _xy_hist_on_server(data, x, y, color, aggregate, x_bin, y_bin):
+    x_col = _get_column(data, x)
+    y_col = _get_column(data, y)
+    color_col = _get_column(data, color)
+
+    x_values = data[x_col].to_numpy()
+    y_values = data[y_col].to_numpy()
+
+    x_start, x_stop, x_step = _aggregate.bin_params(x_bin, x_values)
+    y_start, y_stop, y_step = _aggregate.bin_params(y_bin, y_values)
+    x_index, num_x_bins = _aggregate.bin_index(x_values, x_start, x_stop, x_step)
+    y_index, num_y_bins = _aggregate.bin_index(y_values, y_start, y_stop, y_step)
+
+    index = x_index * num_y_bins + y_index
+    index[(x_index < 0) | (y_index < 0)] = -1
+
+    color_values = None if color_col is None else data[color_col].to_numpy()
+    cells, result = _aggregate.reduce_nonempty(
+        index, num_x_bins * num_y_bins, color_values, aggregate)
+
+    x_bins, y_bins = np.divmod(cells, num_y_bins)
+    x_starts = x_start + x_step * x_bins
+    y_starts = y_start + y_step * y_bins
+
+    x_enc, x2_enc = _binned_encodings(x_col, x_step)
+    y_enc, y2_enc = _binned_encodings(y_col, y_step)
+
+    taken = {x_col, x2_enc['field'], y_col, y2_enc['field']}
+
+    if len(taken) < 4:
+        raise ValueError('x and y must be different columns.')
+
+    value_name = 'count' if aggregate == 'count' else color_col
+    value_name = _unique_name(value_name, taken)
+    color_enc = D(
+        field=value_name,
+        type='quantitative',
+        title=_aggregate.title(aggregate, color_col),
+    )
+
+    binned_data = pd.DataFrame({
+        x_col: x_starts,
+        x2_enc['field']: x_starts + x_step,
+        y_col: y_starts,
+        y2_enc['field']: y_starts + y_step,
+        value_name: result,
+    })
+
+    return binned_data, x_enc, x2_enc, y_enc, y2_enc, color_enc
+
+
+# Pixels per side of each cell in density heatmaps.
+_DENSITY_CELL_PIXELS = 6
+
+# Chart size to assume for density heatmaps when the width or height isn't given.
+_DENSITY_DEFAULT_WIDTH = 600
+_DENSITY_DEFAULT_HEIGHT = 300
+
+
+def _use_density(density, data, x, y, max_points):
+    """Decide how to draw a scatter chart: returns 'rect', 'hex', or None for points."""
+    if density is None:
+        return None
+
+    supported = (
+        _get_column(data, x) != _get_column(data, y)
+        and _can_bin_on_server(data, x, True)
+        and _can_bin_on_server(data, y, True))
+
+    if density == 'auto':
+        threshold = _OPTIONS['server_compute_rows'] if max_points is None else max_points
+        return 'rect' if supported and len(data) > threshold else None
+
+    if density in {'rect', 'hex'}:
+        if not supported:
+            raise ValueError(
+                f"density='{density}' requires x and y to be two different numeric columns.")
+        return density
+
+    raise ValueError(f'Unknown density mode: {density}')
+
+
+def _rect_density_on_server(data, x, y, value, width, height, legend):
+    x_col = _get_column(data, x)
+    y_col = _get_column(data, y)
+
+    x_values = data[x_col].to_numpy()
+    y_values = data[y_col].to_numpy()
+
+    x_bin = D(maxbins=max(1, (width or _DENSITY_DEFAULT_WIDTH) // _DENSITY_CELL_PIXELS))
+    y_bin = D(maxbins=max(1, (height or _DENSITY_DEFAULT_HEIGHT) // _DENSITY_CELL_PIXELS))
+
+    x_start, x_stop, x_step = _aggregate.bin_params(x_bin, x_values)
+    y_start, y_stop, y_step = _aggregate.bin_params(y_bin, y_values)
+    x_index, num_x_bins = _aggregate.bin_index(x_values, x_start, x_stop, x_step)
+    y_index, num_y_bins = _aggregate.bin_index(y_values, y_start, y_stop, y_step)
 
+    index = x_index * num_y_bins + y_index
+    index[(x_index < 0) | (y_index < 0)] = -1
 
+    num_cells = num_x_bins * num_y_bins
+    cells, counts = _aggregate.reduce_nonempty(index, num_cells, None, 'count')
+
+    x_bins, y_bins = np.divmod(cells, num_y_bins)
+    x_starts = x_start + x_step * x_bins
+    y_starts = y_start + y_step * y_bins
+
+    x_enc, x2_enc = _binned_encodings(x_col, x_step)
+    y_enc, y2_enc = _binned_encodings(y_col, y_step)
+
+    columns = {
+        x_col: x_starts,
+        x2_enc['field']: x_starts + x_step,
+        y_col: y_starts,
+        y2_enc['field']: y_starts + y_step,
+    }
+
+    color_enc, opacity_enc = _aggregate_cells(
+        data, value, index, num_cells, cells, counts, columns, legend)
+
+    return D(
+        data=pd.DataFrame(columns),
+        mark=D(type='rect', tooltip=True),
+        encoding=D(
+            x=x_enc,
+            x2=x2_enc,
+            y=y_enc,
+            y2=y2_enc,
+            color=color_enc,
+            opacity=opacity_enc,
+        ),
+    )
+
+
+# Radius of each hexagon in hexbin charts, in pixels.
+_HEX_RADIUS_PIXELS = 8
+
+# A pointy-top hexagon with a circumradius of 1, as a Vega symbol shape. Vega scales custom
+# shapes so that 1 unit is sqrt(size) / 2 pixels.
+_HEX_SHAPE = 'M0,-1L0.866,-0.5L0.866,0.5L0,1L-0.866,0.5L-0.866,-0.5Z'
+
+
+def _hex_density_on_server(data, x, y, value, width, height, legend):
+    x_col = _get_column(data, x)
+    y_col = _get_column(data, y)
+
+    x_values = data[x_col].to_numpy(dtype='float64', na_value=np.nan)
+    y_values = data[y_col].to_numpy(dtype='float64', na_value=np.nan)
+    valid = np.isfinite(x_values) & np.isfinite(y_values)
+
+    width = width or _DENSITY_DEFAULT_WIDTH
+    height = height or _DENSITY_DEFAULT_HEIGHT
+
+    if valid.any():
+        x_lo, x_hi = x_values[valid].min(), x_values[valid].max()
+        y_lo, y_hi = y_values[valid].min(), y_values[valid].max()
+    else:
+        x_lo, x_hi, y_lo, y_hi = 0, 1, 0, 1
+
+    x_span = (x_hi - x_lo) or 1
+    y_span = (y_hi - y_lo) or 1
+
+    # Hexagons must be regular on screen, so bin in pixel coordinates.
+    with np.errstate(invalid='ignore'):
+        px = (x_values - x_lo) / x_span * width
+        py = (y_values - y_lo) / y_span * height
+
+    cols, rows = _aggregate.hex_index(px, py, _HEX_RADIUS_PIXELS)
+    cols = np.where(valid, cols, 0)
+    rows = np.where(valid, rows, 0)
+
+    col_lo = cols[valid].min(initial=0)
+    row_lo = rows[valid].min(initial=0)
+    num_rows = int(rows[valid].max(initial=0) - row_lo) + 1
+    num_cols = int(cols[valid].max(initial=0) - col_lo) + 1
+
+    index = (cols - col_lo) * num_rows + (rows - row_lo)
+    index[~valid] = -1
+
+    num_cells = num_cols * num_rows
+    cells, counts = _aggregate.reduce_nonempty(index, num_cells, None, 'count')
+
+    cell_cols, cell_rows = np.divmod(cells, num_rows)
+    center_x, center_y = _aggregate.hex_center(
+        cell_cols + col_lo, cell_rows + row_lo, _HEX_RADIUS_PIXELS)
+
+    columns = {
+        x_col: x_lo + center_x / width * x_span,
+        y_col: y_lo + center_y / height * y_span,
+    }
+
+    color_enc, opacity_enc = _aggregate_cells(
+        data, value, index, num_cells, cells, counts, columns, legend)
+
+    # Pin the scales to the range that was binned, so the hexagons tile without gaps.
+    def position_enc(column, lo, hi):
+        return D(
+            field=column,
+            type='quantitative',
+            scale=D(domain=[float(lo), float(hi)], nice=False, zero=False),
+        )
+
+    return D(
+        data=pd.DataFrame(columns),
+        width=width,
+        height=height,
+        mark=D(
+            type='point',
+            shape=_HEX_SHAPE,
+            filled=True,
+            size=4 * _HEX_RADIUS_PIXELS ** 2,
+            opacity=1,
+            tooltip=True,
+        ),
+        encoding=D(
+            x=position_enc(x_col, x_lo, x_hi),
+            y=position_enc(y_col, y_lo, y_hi),
+            color=color_enc,
+            opacity=opacity_enc,
+        ),
+    )
+
+
+def _aggregate_cells(data, value, index, num_cells, cells, counts, columns, legend):
+    """Add each cell's count and aggregated value to columns, and return their encodings.
+
+    Returns
+    -------
+    tuple of (color_enc, opacity_enc)
+    """
+    value_col = _get_column(data, value)
+
+    count_name = _unique_name('count', columns)
+    columns[count_name] = counts
+    count_enc = D(field=count_name, type='quantitative', title=_aggregate.title('count', None))
+
+    if value_col is None:
+        return count_enc, None
+
+    value_name = _unique_name(value_col, columns)
+
+    if _can_aggregate_on_server(data, value, 'mean'):
+        _, columns[value_name] = _aggregate.reduce_nonempty(
+            index, num_cells, data[value_col].to_numpy(), 'mean')
+        color_enc = D(
+            field=value_name,
+            type='quantitative',
+            title=_aggregate.title('mean', value_col),
+        )
+        return color_enc, None
+
+    # Categories can't be averaged, so color each cell by its most common one and let the
+    # opacity show how many points are in it.
+    mode_cells, modes = _aggregate.mode(index, data[value_col])
+    columns[value_name] = pd.Series(modes, index=mode_cells).reindex(cells).to_numpy()
+    color_enc = D(field=value_name, type='nominal', title=value_col, legend=legend)
+    opacity_enc = dict(count_enc, legend=None)
+
+    return color_enc, opacity_enc
+
+
+def _density_on_server(data, x, y, value, density, width, height, legend):
+    """Return a view spec, with its own binned data, drawing the density of the points."""
+    if density == 'hex':
+        return _hex_density_on_server(data, x, y, value, width, height, legend)
+    return _rect_density_on_server(data, x, y, value, width, height, legend)
+
+
+@_memoize
 def hist(
         data,
         x,
@@ -1193,6 +2475,7 @@ def hist(
         legend='bottom',
         pan_zoom=None,
         use_container_width=True,
+        compute='auto',
     ):
     """Calculate and draw a histogram.
 
@@ -1218,16 +2501,22 @@ def hist(
         Allows you to customize the binning properties for the histogram.
         If None, uses the default binning properties.
         See https://vega.github.io/vega-lite/docs/bin.html#bin-parameters>
-    x_annot : dict or list or None
+    x_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific X-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [x_value_1, x_value_2, ...]
             - dict style: {x_value_1: label_1, x_value_2: label_2, ...}
-    y_annot : dict or list or None
+            - Series style: a Series of x values.
+            - DataFrame style: x values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
+    y_annot : dict or list or Series or DataFrame or None
         Annotations to draw on top the chart, tied to specific Y-axis values.
-        Can be specified as a dict or a list:
+        Can be specified as a dict, a list, a Series or a DataFrame:
             - list style: [y_value_1, y_value_2, ...]
             - dict style: {y_value_1: label_1, y_value_2: label_2, ...}
+            - Series style: a Series of y values.
+            - DataFrame style: y values in the first column, and labels in the second, if any.
+        Series and DataFrames are the fastest way to draw many annotations.
     width : number or None
         Chart width in pixels or None for default. See also, use_container_width.
     height : number or None
@@ -1247,8 +2536,30 @@ def hist(
     use_container_width : bool
         If True, sets the chart to use all available space. This takes precedence over the width
         parameter.
+    compute : str
+        Where to calculate the histogram. Allowed values:
+            - 'client': send every row to the browser and let Vega-Lite bin and aggregate them.
+            - 'server': bin and aggregate in Python, and only send one row per bin to the
+              browser. Requires x to be a numeric column, and the aggregate to be one of
+              'count', 'sum', 'mean', 'min', 'max', 'median', 'distinct', 'valid', 'stdev' or
+              'variance'.
+            - 'auto': same as 'server' when possible and the data has more rows than the
+              'server_compute_rows' option. Otherwise, same as 'client'.
     """
 
+    on_server = _use_server_compute(
+        compute,
+        data,
+        _can_bin_on_server(data, x, bin) and _can_aggregate_on_server(data, y, aggregate),
+    )
+
+    if on_server:
+        data, x_enc, x2_enc, y_enc = _hist_on_server(data, x, y, aggregate, bin)
+    else:
+        x_enc = _clean_encoding(data, x, bin=bin or True)
+        x2_enc = None
+        y_enc = _clean_encoding(data, y, aggregate=aggregate)
+
     meta = D(
         data=data,
         width=width,
@@ -1259,8 +2570,9 @@ def hist(
     spec = D(
         mark=D(type='bar', tooltip=True),
         encoding=D(
-            x=_clean_encoding(data, x, bin=bin or True),
-            y=_clean_encoding(data, y, aggregate=aggregate),
+            x=x_enc,
+            x2=x2_enc,
+            y=y_enc,
         ),
         selection=_get_selection(pan_zoom),
     )
@@ -1268,9 +2580,10 @@ def hist(
     spec = _add_annotations(spec, x_annot, y_annot)
     spec.update(meta)
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    _draw(spec, use_container_width)
 
 
+@_memoize
 def scatter_hist(
         data,
         x,
@@ -1287,48 +2600,95 @@ def scatter_hist(
         legend='bottom',
         pan_zoom=None,
         use_container_width=True,
+        density=None,
+        max_points=None,
     ):
 
     legend = _get_legend_dict(legend)
+    density = _use_density(density, data, x, y, max_points)
 
-    scatter_spec = D(
-        mark=D(type='circle', tooltip=True),
-        width=width,
-        height=height,
-        title=title,
-        encoding=D(
-            x=_clean_encoding(data, x),
-            y=_clean_encoding(data, y),
-            color=_clean_encoding(data, color, legend=legend),
-            size=_clean_encoding(data, size, legend=legend),
-            opacity=_clean_encoding(data, opacity, legend=legend),
-        ),
-    )
+    if density:
+        # Same as in scatter_chart(). The histograms are binned on the server too, so the
+        # full data never reaches the browser.
+        value = color if _get_column(data, color) is not None else size
+        scatter_spec = _density_on_server(data, x, y, value, density, width, height, legend)
+
+        if density == 'hex':
+            # Same as in _density_chart().
+            width = scatter_spec['width']
+            height = scatter_spec['height']
+            use_container_width = False
 
-    x_hist_spec = D(
+        scatter_spec.update(width=width, height=height, title=title)
+    else:
+        scatter_spec = D(
+            mark=D(type='circle', tooltip=True),
+            width=width,
+            height=height,
+            title=title,
+            encoding=D(
+                x=_clean_encoding(data, x),
+                y=_clean_encoding(data, y),
+                color=_clean_encoding(data, color, legend=legend),
+                size=_clean_encoding(data, size, legend=legend),
+                opacity=_clean_encoding(data, opacity, legend=legend),
+            ),
+        )
+
+    x_hist_on_server = (
+        density
+        and _can_bin_on_server(data, x, x_bin or True)
+        and _can_aggregate_on_server(data, y, aggregate))
+
+    if x_hist_on_server:
+        x_hist_data, x_enc, x2_enc, y_enc = _hist_on_server(data, x, y, aggregate, x_bin)
+        x_enc.update(title=None, axis=None)
+        y_enc.update(title=None)
+        x_hist_spec = D(data=x_hist_data, encoding=D(x=x_enc, x2=x2_enc, y=y_enc))
+    else:
+        x_hist_spec = D(encoding=D(
+            x=_clean_encoding(data, x, bin=x_bin or True, title=None, axis=None),
+            y=_clean_encoding(data, y, aggregate=aggregate, title=None),
+        ))
+
+    x_hist_spec.update(
         mark=D(type='bar', tooltip=True),
         width=width,
         height=_MINI_CHART_SIZE,
-        encoding=D(
-            x=_clean_encoding(data, x, bin=x_bin or True, title=None, axis=None),
-            y=_clean_encoding(data, y, aggregate=aggregate, title=None),
-        ),
     )
 
-    y_hist_spec = D(
+    y_hist_on_server = (
+        density
+        and _can_bin_on_server(data, y, y_bin or True)
+        and _can_aggregate_on_server(data, x, aggregate))
+
+    if y_hist_on_server:
+        y_hist_data, y_enc, y2_enc, x_enc = _hist_on_server(data, y, x, aggregate, y_bin)
+        y_enc.update(title=None, axis=None)
+        x_enc.update(title=None)
+        y_hist_spec = D(data=y_hist_data, encoding=D(x=x_enc, y=y_enc, y2=y2_enc))
+    else:
+        y_hist_spec = D(encoding=D(
+            x=_clean_encoding(data, x, aggregate=aggregate, title=None),
+            y=_clean_encoding(data, y, bin=y_bin or True, title=None, axis=None),
+        ))
+
+    y_hist_spec.update(
         mark=D(type='bar', tooltip=True),
         height=height,
         width=_MINI_CHART_SIZE,
-        encoding=D(
-            x=_clean_encoding(data, x, aggregate=aggregate, title=None),
-            y=_clean_encoding(data, y, bin=y_bin or True, title=None, axis=None),
-        ),
     )
 
+    if density and x_hist_on_server and y_hist_on_server:
+        # Every view has its own binned data.
+        data = None
+
     spec = D(
-        data=data,
         title=title,
         vconcat=[x_hist_spec, D(hconcat=[scatter_spec, y_hist_spec])],
     )
 
-    st.vega_lite_chart(spec, use_container_width=use_container_width)
+    if data is not None:
+        spec['data'] = data
+
+    _draw(spec, use_container_width)
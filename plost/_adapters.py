@@ -0,0 +1,104 @@
+"""Adapters that let chart functions accept Arrow tables and Polars frames, not just Pandas.
+
+Neither PyArrow nor Polars is a dependency of Plost, so inputs are recognized by the module
+their type comes from rather than with isinstance().
+"""
+
+import pandas as pd
+
+
+def _module(data):
+    return type(data).__module__.split('.', 1)[0]
+
+
+def is_arrow_table(data):
+    return _module(data) == 'pyarrow' and type(data).__name__ == 'Table'
+
+
+def is_polars_frame(data):
+    return _module(data) == 'polars' and type(data).__name__ in ('DataFrame', 'LazyFrame')
+
+
+def is_supported(data):
+    """Whether to_pandas() knows how to convert this object."""
+    return is_arrow_table(data) or is_polars_frame(data)
+
+
+def referenced_columns(args, kwargs):
+    """Collect every name a chart function call could be using as a column.
+
+    This includes every string argument (also inside lists and tuples), with and without its
+    Altair-style type suffix, as well as the "field" of every encoding dict. Strings that are
+    not column names are harmless, since they're intersected with the table's columns.
+    """
+    names = set()
+
+    def collect(value):
+        if isinstance(value, str):
+            names.add(value)
+            names.add(value.rsplit(':', 1)[0])
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                collect(v)
+        elif isinstance(value, dict):
+            field = value.get('field')
+            if isinstance(field, str):
+                names.add(field)
+
+    for v in args:
+        collect(v)
+
+    for v in kwargs.values():
+        collect(v)
+
+    return names
+
+
+def _schema_names(data):
+    if is_arrow_table(data):
+        return list(data.column_names)
+
+    if type(data).__name__ == 'LazyFrame':
+        return list(data.collect_schema().names())
+
+    return list(data.columns)
+
+
+def to_pandas(data, columns=None):
+    """Convert an Arrow table or Polars frame to a Pandas DataFrame, keeping only some columns.
+
+    Columns are selected before converting, using the source library, so unused columns are
+    never materialized. Polars lazy frames are only collected for the selected columns.
+    Anything that is not an Arrow table or Polars frame is returned unchanged.
+
+    Parameters
+    ----------
+    data : any
+    columns : set of str or None
+        Names of the columns to keep, or None to keep all of them. Names that are not columns
+        of data are ignored.
+
+    Returns
+    -------
+    DataFrame or any
+    """
+    if not is_supported(data):
+        return data
+
+    if columns is not None:
+        columns = [c for c in _schema_names(data) if c in columns]
+
+    if is_arrow_table(data):
+        table = data if columns is None else data.select(columns)
+
+    else:
+        frame = data if columns is None else data.select(columns)
+
+        if type(frame).__name__ == 'LazyFrame':
+            frame = frame.collect()
+
+        table = frame.to_arrow()
+
+    # split_blocks avoids consolidating same-typed columns into a 2D block, which would copy
+    # them. Numeric columns without nulls can then share memory with the Arrow buffers.
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,566 @@
+"""Server-side binning and aggregation, for when there is too much data to send to the browser."""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# Bin parameters that bin_params() knows how to handle.
+# See https://vega.github.io/vega-lite/docs/bin.html#bin-parameters
+SUPPORTED_BIN_PARAMS = {'maxbins', 'step', 'steps', 'extent', 'base', 'divide', 'minstep', 'nice'}
+
+# Vega-Lite's default for the x and y channels.
+DEFAULT_MAXBINS = 10
+
+# Aggregation ops that can be calculated with NumPy alone.
+NUMPY_OPS = {'count', 'sum', 'mean', 'average', 'min', 'max'}
+
+# Other Vega-Lite aggregation ops, and their Pandas equivalents.
+PANDAS_OPS = {
+    'median': 'median',
+    'distinct': 'nunique',
+    'valid': 'count',
+    'stdev': 'std',
+    'variance': 'var',
+}
+
+SUPPORTED_OPS = NUMPY_OPS | set(PANDAS_OPS)
+
+# Ops that work on any column, not just numeric ones.
+NON_NUMERIC_OPS = {'count', 'distinct', 'valid'}
+
+# The parts that Vega-Lite time units are made of, longest first so "dayofyear" wins over "day".
+# See https://vega.github.io/vega-lite/docs/timeunit.html
+_TIME_UNIT_PARTS = sorted([
+    'year', 'quarter', 'month', 'week', 'day', 'dayofyear', 'date',
+    'hours', 'minutes', 'seconds', 'milliseconds',
+], key=len, reverse=True)
+
+# The order in which Vega-Lite lists the parts of a time unit in titles.
+_TIME_UNIT_TITLE_ORDER = [
+    'year', 'quarter', 'month', 'week', 'day', 'dayofyear', 'date',
+    'hours', 'minutes', 'seconds', 'milliseconds',
+]
+
+# Vega places time units that don't include a year in 2012, since that's a leap year that
+# starts on a Sunday.
+_TIME_UNIT_BASE_YEAR = 2012
+
+# Same as Vega's bin transform.
+_EPSILON = 1e-14
+
+# Up to this many groups, it's cheaper to aggregate into a dense array than to look for the
+# non-empty groups first.
+_DENSE_GROUPS = 1 << 16
+
+
+def can_bin(bin):
+    """Whether a Vega-Lite bin spec (True, None or dict) can be calculated by bin_params()."""
+    if bin is None or bin is True:
+        return True
+
+    if isinstance(bin, dict):
+        return set(bin) <= SUPPORTED_BIN_PARAMS
+
+    return False
+
+
+def is_binnable(series):
+    """Whether a column holds numbers that can be binned on the server."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def bin_params(bin, values):
+    """Calculate the start, stop and step of the bins, the same way Vega does.
+
+    Parameters
+    ----------
+    bin : True or None or dict
+        Vega-Lite bin parameters.
+    values : array
+        The values to be binned. Only used to calculate the extent, if the bin spec doesn't have
+        one. If there are no finite values, bins are laid out as if all values were 0, so every
+        value falls outside of them.
+
+    Returns
+    -------
+    tuple of (start, stop, step)
+    """
+    if not isinstance(bin, dict):
+        bin = {}
+
+    if 'extent' in bin:
+        lo, hi = bin['extent']
+    else:
+        values = np.asarray(values, dtype='float64')
+        values = values[np.isfinite(values)]
+        lo, hi = (values.min(), values.max()) if len(values) else (0, 0)
+
+    lo = float(lo)
+    hi = float(hi)
+
+    maxbins = bin.get('maxbins', DEFAULT_MAXBINS)
+    base = bin.get('base', 10)
+    divide = bin.get('divide', (5, 2))
+    minstep = bin.get('minstep', 0)
+    logb = math.log(base)
+    span = (hi - lo) or abs(lo) or 1
+
+    if bin.get('step'):
+        step = bin['step']
+
+    elif bin.get('steps'):
+        steps = bin['steps']
+        v = span / maxbins
+        i = 0
+        while i < len(steps) and steps[i] < v:
+            i += 1
+        step = steps[max(0, i - 1)]
+
+    else:
+        level = math.ceil(math.log(maxbins) / logb)
+        step = max(minstep, base ** (math.floor(math.log(span) / logb + 0.5) - level))
+
+        while math.ceil(span / step) > maxbins:
+            step *= base
+
+        for d in divide:
+            v = step / d
+            if v >= minstep and span / v <= maxbins:
+                step = v
+
+    v = math.log(step)
+    precision = 0 if v >= 0 else int(-v / logb) + 1
+    eps = base ** (-precision - 1)
+
+    if bin.get('nice', True):
+        v = math.floor(lo / step + eps) * step
+        lo = v - step if lo < v else v
+        hi = math.ceil(hi / step) * step
+
+    if hi == lo:
+        hi = lo + step
+
+    return lo, hi, step
+
+
+def bin_index(values, start, stop, step):
+    """Return the bin number of each value, and the total number of bins.
+
+    Values that are NaN or fall outside [start, stop] get a bin number of -1.
+    """
+    num_bins = max(1, int(round((stop - start) / step)))
+    values = np.asarray(values, dtype='float64')
+
+    with np.errstate(invalid='ignore'):
+        index = np.floor((values - start) / step + _EPSILON)
+        valid = (values >= start) & (values <= stop)
+
+    # Values that are exactly at the end of the range go in the last bin.
+    index = np.minimum(index, num_bins - 1)
+    index[~valid] = -1
+
+    return index.astype('int64'), num_bins
+
+
+def reduce(index, num_groups, values, op):
+    """Aggregate values by group index.
+
+    Parameters
+    ----------
+    index : int array
+        The group of each value, from 0 to num_groups - 1. Negative numbers are skipped.
+    num_groups : int
+    values : array or None
+        The values to aggregate. Can be None if op is 'count'.
+    op : str
+        A Vega-Lite aggregation op. See SUPPORTED_OPS.
+
+    Returns
+    -------
+    tuple of (result, nonempty)
+        Where result is an array with one item per group, and nonempty is a boolean array saying
+        which of those groups contain at least one row.
+    """
+    keep = index >= 0
+    counts = np.bincount(index[keep], minlength=num_groups)
+    nonempty = counts > 0
+
+    if op == 'count':
+        return counts, nonempty
+
+    if op not in SUPPORTED_OPS:
+        raise ValueError(f'Unsupported aggregation op: {op}')
+
+    values = np.asarray(values)
+
+    if op in PANDAS_OPS:
+        groups = pd.Series(values[keep]).groupby(index[keep])
+
+        if op == 'distinct':
+            # Vega counts missing values as one more distinct value, while Pandas skips them.
+            grouped = groups.nunique(dropna=False)
+        else:
+            grouped = groups.agg(PANDAS_OPS[op])
+
+        result = np.full(num_groups, np.nan)
+        result[grouped.index.to_numpy()] = grouped.to_numpy()
+        return result, nonempty
+
+    # Like Vega-Lite, skip invalid values.
+    values = values.astype('float64')
+    keep &= ~np.isnan(values)
+    index = index[keep]
+    values = values[keep]
+    valid_counts = np.bincount(index, minlength=num_groups)
+
+    if op == 'sum':
+        result = np.bincount(index, weights=values, minlength=num_groups)
+
+    elif op in {'mean', 'average'}:
+        sums = np.bincount(index, weights=values, minlength=num_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = sums / valid_counts
+
+    elif op == 'min':
+        result = np.full(num_groups, np.inf)
+        np.minimum.at(result, index, values)
+
+    elif op == 'max':
+        result = np.full(num_groups, -np.inf)
+        np.maximum.at(result, index, values)
+
+    if op != 'sum':
+        result[valid_counts == 0] = np.nan
+
+    return result, nonempty
+
+
+def reduce_nonempty(index, num_groups, values, op):
+    """Like reduce(), but only return the groups that contain at least one row.
+
+    This avoids allocating num_groups items when there are far more groups than rows, like with
+    fine-grained 2D bins.
+
+    Returns
+    -------
+    tuple of (groups, result)
+        Where groups are the sorted group numbers that contain rows, and result holds their
+        aggregated values.
+    """
+    if num_groups <= max(len(index), _DENSE_GROUPS):
+        result, nonempty = reduce(index, num_groups, values, op)
+        groups = np.flatnonzero(nonempty)
+        return groups, result[groups]
+
+    keep = index >= 0
+    groups, inverse = np.unique(index[keep], return_inverse=True)
+
+    if values is not None:
+        values = np.asarray(values)[keep]
+
+    result, _ = reduce(inverse.astype('int64'), len(groups), values, op)
+    return groups, result
+
+
+def mode(index, values):
+    """Return the most common value in each group, ignoring missing values.
+
+    Parameters
+    ----------
+    index : int array
+        The group of each value. Negative numbers are skipped.
+    values : array or Series
+        Values of any type.
+
+    Returns
+    -------
+    tuple of (groups, result)
+        Where groups are the sorted group numbers that contain at least one valid value, and
+        result holds their most common values. Ties go to the value that appears first in the
+        data.
+    """
+    codes, uniques = pd.factorize(values)
+    keep = (index >= 0) & (codes >= 0)
+    num_uniques = max(1, len(uniques))
+
+    keys = index[keep].astype('int64') * num_uniques + codes[keep]
+    pairs, counts = np.unique(keys, return_counts=True)
+    groups, value_codes = np.divmod(pairs, num_uniques)
+
+    # Sort each group's values by decreasing count, then keep the first one of each group.
+    # Codes are in order of appearance, which breaks ties.
+    order = np.lexsort((value_codes, -counts, groups))
+    groups = groups[order]
+    value_codes = value_codes[order]
+    first = np.ones(len(groups), dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+
+    return groups[first], np.asarray(uniques)[value_codes[first]]
+
+
+def hex_index(x, y, radius):
+    """Return the column and row of the hexagon each point falls in.
+
+    Uses a grid of pointy-top hexagons with the given circumradius, where odd rows are shifted
+    right by half a hexagon. This is the same layout as d3-hexbin.
+
+    Parameters
+    ----------
+    x : float array
+    y : float array
+    radius : number
+
+    Returns
+    -------
+    tuple of (cols, rows)
+        Two int arrays.
+    """
+    dx = radius * math.sqrt(3)
+    dy = radius * 1.5
+
+    with np.errstate(invalid='ignore'):
+        py = np.asarray(y, dtype='float64') / dy
+        rows = np.nan_to_num(np.rint(py)).astype('int64')
+        odd = rows & 1
+        px = np.asarray(x, dtype='float64') / dx - odd / 2
+        cols = np.nan_to_num(np.rint(px)).astype('int64')
+
+        # Points near the top or bottom edge of a hexagon's bounding box may belong to one of
+        # the hexagons in the next row. Pick whichever center is closest, measuring distances
+        # in the original units (d3-hexbin measures them in grid units, which is slightly off).
+        near = np.flatnonzero(np.abs(py - rows) * 3 > 1)
+
+    px = px[near]
+    py = py[near]
+    cols1 = cols[near]
+    rows1 = rows[near]
+
+    cols2 = cols1 + np.where(px < cols1, -0.5, 0.5)
+    rows2 = rows1 + np.where(py < rows1, -1, 1)
+    dist1 = ((px - cols1) * dx) ** 2 + ((py - rows1) * dy) ** 2
+    dist2 = ((px - cols2) * dx) ** 2 + ((py - rows2) * dy) ** 2
+    use_other = dist1 > dist2
+
+    other = near[use_other]
+    cols[other] = (cols2[use_other] + np.where(odd[other] == 1, 0.5, -0.5)).astype('int64')
+    rows[other] = rows2[use_other]
+
+    return cols, rows
+
+
+def hex_center(cols, rows, radius):
+    """Return the x and y coordinates of the centers of the hexagons from hex_index()."""
+    dx = radius * math.sqrt(3)
+    dy = radius * 1.5
+    return (cols + (rows % 2) / 2) * dx, rows * dy
+
+
+def sum_by(data, keys, value):
+    """Sum a column of a DataFrame for each combination of the key columns.
+
+    Returns
+    -------
+    DataFrame
+        With one row per combination of keys, in order of first appearance.
+    """
+    return (
+        data.groupby(list(keys), sort=False, observed=True, dropna=False)[value]
+        .sum()
+        .reset_index())
+
+
+def top_keys(data, key, values, k):
+    """Return the k values of the key column whose rows have the largest sum, largest first.
+
+    Parameters
+    ----------
+    data : DataFrame
+    key : str
+    values : list of str
+        Numeric columns. A key's total is the sum of all of them.
+    k : int
+
+    Returns
+    -------
+    list
+    """
+    totals = data.groupby(key, sort=False, observed=True)[list(values)].sum().sum(axis=1)
+    return totals.nlargest(k).index.tolist()
+
+
+def fold_others(data, key, values, by, keep, other_label):
+    """Merge the rows of all keys that aren't in keep into a single key, and sum them.
+
+    Parameters
+    ----------
+    data : DataFrame
+    key : str
+        Column to fold.
+    values : list of str
+        Numeric columns to sum.
+    by : list of str
+        Other columns whose combinations should stay apart, like the ones for colors.
+    keep : list
+        Values of key to keep as they are.
+    other_label : str
+        What to call the merged key.
+
+    Returns
+    -------
+    tuple of (folded, order)
+        Where folded is a DataFrame with one row per combination of key and by, with the key
+        column converted to strings, and order is the list of its keys in the order of keep
+        followed by other_label (if anything was merged into it).
+    """
+    def sum_groups(frame):
+        return (
+            frame.groupby([key, *by], sort=False, observed=True, dropna=False)[list(values)]
+            .sum()
+            .reset_index())
+
+    # Sum first, so the relabeling below only touches one row per group.
+    frame = sum_groups(data)
+
+    labels = frame[key].astype(str)
+    keep = [str(k) for k in keep]
+
+    is_kept = labels.isin(keep)
+    frame[key] = labels.where(is_kept, other_label)
+
+    folded = sum_groups(frame)
+
+    order = keep if is_kept.all() else [*keep, other_label]
+
+    return folded, order
+
+
+def parse_time_unit(unit):
+    """Split a Vega-Lite time unit like 'utcyearmonth' into ('utc', {'year', 'month'}).
+
+    Returns None if the unit is not a string that can be parsed.
+    """
+    if not isinstance(unit, str):
+        return None
+
+    utc = unit.startswith('utc')
+    rest = unit[3:] if utc else unit
+    parts = set()
+
+    while rest:
+        for part in _TIME_UNIT_PARTS:
+            if rest.startswith(part):
+                parts.add(part)
+                rest = rest[len(part):]
+                break
+        else:
+            return None
+
+    if not parts:
+        return None
+
+    return utc, parts
+
+
+def time_unit_floor(series, unit):
+    """Truncate datetimes to a Vega-Lite time unit, the way Vega's timeUnit transform does.
+
+    Parts that are not in the unit get reset, and dates without a year are placed in 2012. So,
+    for example, all Mondays map to 2012-01-02 when the unit is 'day'. Since the result is
+    already truncated, encoding it with the same timeUnit draws it exactly like the raw data.
+
+    Parameters
+    ----------
+    series : datetime Series
+        Must not contain nulls.
+    unit : str
+        Vega-Lite time unit. See parse_time_unit().
+
+    Returns
+    -------
+    datetime64[ms] array
+    """
+    utc, parts = parse_time_unit(unit)
+
+    if series.dt.tz is not None:
+        if utc:
+            series = series.dt.tz_convert('UTC')
+        series = series.dt.tz_localize(None)
+
+    dt = series.dt
+    n = len(series)
+
+    def get(part, values, default):
+        if part in parts:
+            return np.asarray(values, dtype='int64')
+        return np.full(n, default, dtype='int64')
+
+    year = get('year', dt.year, _TIME_UNIT_BASE_YEAR)
+
+    if 'month' in parts:
+        month = np.asarray(dt.month, dtype='int64') - 1
+    elif 'quarter' in parts:
+        month = 3 * ((np.asarray(dt.month, dtype='int64') - 1) // 3)
+    else:
+        month = np.zeros(n, dtype='int64')
+
+    # Days are counted from January 1st of the output year, so they may overflow into later
+    # months, or underflow into the previous year. Same formulas as vega-time: weeks start on
+    # Sundays, and week N of a year runs from its Nth Sunday to the next one, so days before the
+    # first Sunday are in week 0.
+    first_day = _sunday_based_weekday(
+        (year - 1970).astype('datetime64[Y]').astype('datetime64[D]'))
+    weekday = (np.asarray(dt.dayofweek, dtype='int64') + 1) % 7
+
+    if 'week' in parts:
+        actual_first_day = _sunday_based_weekday(
+            (np.asarray(dt.year, dtype='int64') - 1970).astype('datetime64[Y]')
+            .astype('datetime64[D]'))
+        # Number of Sundays from January 1st up to the date, inclusive.
+        week = (np.asarray(dt.dayofyear, dtype='int64') + (actual_first_day + 6) % 7) // 7
+        day = _week_day(week, weekday if 'day' in parts else 0, first_day)
+    elif 'day' in parts:
+        day = _week_day(1, weekday, first_day)
+    elif 'date' in parts:
+        day = np.asarray(dt.day, dtype='int64')
+    elif 'dayofyear' in parts:
+        day = np.asarray(dt.dayofyear, dtype='int64')
+    else:
+        day = np.ones(n, dtype='int64')
+
+    ms = (
+        get('hours', dt.hour, 0) * 3_600_000
+        + get('minutes', dt.minute, 0) * 60_000
+        + get('seconds', dt.second, 0) * 1000
+        + get('milliseconds', dt.microsecond // 1000, 0))
+
+    months = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + month
+    days = months.astype('datetime64[D]') + (day - 1)
+
+    return days.astype('datetime64[ms]') + ms.astype('timedelta64[ms]')
+
+
+def _week_day(week, weekday, first_day):
+    # Day of the month (possibly out of range) of a weekday in a week of a year whose January 1st
+    # falls on first_day. Port of vega-time's weekday().
+    return weekday + 7 * week - (first_day + 6) % 7
+
+
+def _sunday_based_weekday(days):
+    # 1970-01-01 was a Thursday.
+    return (days.astype('int64') + 4) % 7
+
+
+def time_unit_title(field, unit):
+    """Axis/legend title for a field with a time unit, matching Vega-Lite's defaults."""
+    _, parts = parse_time_unit(unit)
+    names = [p for p in _TIME_UNIT_TITLE_ORDER if p in parts]
+    return f"{field} ({'-'.join(names)})"
+
+
+def title(op, field):
+    """Axis/legend title for an aggregated field, matching Vega-Lite's defaults."""
+    if op == 'count':
+        return 'Count of Records'
+    return f'{op.capitalize()} of {field}'
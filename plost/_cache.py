@@ -0,0 +1,169 @@
+"""Memoization of finished chart specs, so Streamlit reruns don't rebuild identical charts."""
+
+import collections
+import contextvars
+import hashlib
+import numbers
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# Key of the chart currently being built, if it should be cached.
+current_key = contextvars.ContextVar('plost_cache_key', default=None)
+
+
+# Pandas arrays that hold their values in Arrow memory. PyArrow is optional, so this checks
+# Pandas' wrapper type rather than importing PyArrow.
+_ARROW_ARRAY_TYPES = getattr(pd.arrays, 'ArrowExtensionArray', ())
+
+
+class Unhashable(Exception):
+    """Raised when some argument can't be turned into a cache key."""
+
+
+def fingerprint(data):
+    """Identify the contents of a DataFrame or Series.
+
+    Uses the shape, column names and types, and a digest of every value (index included). So any
+    edit to the data changes the fingerprint, at the cost of a pass over it.
+    """
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    try:
+        _digest_values(digest, data.index)
+
+        for i in range(data.shape[1]):
+            _digest_values(digest, data.iloc[:, i])
+    except TypeError:
+        raise Unhashable()
+
+    return (
+        type(data).__name__,
+        data.shape,
+        tuple(data.columns),
+        tuple(str(t) for t in data.dtypes),
+        digest.digest(),
+    )
+
+
+def _digest_values(digest, values):
+    """Add the values of a Series or Index to a digest.
+
+    NumPy and Arrow columns are read straight from memory, without copying them. Other columns
+    are hashed with Pandas, one at a time, so only one column's worth of hashes is in memory.
+    """
+    if isinstance(values, pd.RangeIndex):
+        digest.update(repr((values.start, values.stop, values.step)).encode('utf8'))
+        return
+
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+        digest.update(np.ascontiguousarray(values.to_numpy()).view(np.uint8))
+        return
+
+    if not isinstance(values, pd.MultiIndex) and isinstance(values.array, _ARROW_ARRAY_TYPES):
+        # Only Arrow-backed columns get here, so PyArrow is installed.
+        import pyarrow as pa
+
+        array = pa.array(values.array)
+
+        for chunk in getattr(array, 'chunks', [array]):
+            # Slices share their parent's buffers, so the offset and length are part of the value.
+            digest.update(repr((chunk.offset, len(chunk))).encode('utf8'))
+
+            for buffer in chunk.buffers():
+                digest.update(repr(None if buffer is None else buffer.size).encode('utf8'))
+                if buffer is not None:
+                    digest.update(buffer)
+        return
+
+    digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+
+def freeze(value):
+    """Turn a chart argument into something hashable, or raise Unhashable."""
+    if value is None or isinstance(value, (str, bool, numbers.Number)):
+        return value
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return fingerprint(value)
+
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((str(k), freeze(v)) for (k, v) in value.items())))
+
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(freeze(v) for v in value))
+
+    try:
+        hash(value)
+    except TypeError:
+        raise Unhashable()
+
+    return value
+
+
+def make_key(name, args, kwargs, options):
+    """Build the cache key for a chart function call, or return None if it can't be cached."""
+    try:
+        return (
+            name,
+            freeze(args),
+            freeze(kwargs),
+            freeze(options),
+        )
+    except Unhashable:
+        return None
+
+
+def spec_nbytes(spec):
+    """Estimate how much memory the DataFrames in a finished spec use."""
+    nbytes = 0
+
+    for frame in spec.get('datasets', {}).values():
+        if isinstance(frame, pd.DataFrame):
+            nbytes += int(frame.memory_usage(index=True, deep=True).sum())
+
+    return nbytes
+
+
+class SpecCache:
+    """Thread-safe LRU cache whose size is bounded by a total number of bytes."""
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes, max_bytes):
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+
+            if nbytes > max_bytes:
+                return
+
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+
+            while self._nbytes > max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
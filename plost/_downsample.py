@@ -0,0 +1,263 @@
+"""Helpers that reduce the number of rows to draw while keeping the look of the chart."""
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, num_points):
+    """Pick the points to keep using the Largest-Triangle-Three-Buckets algorithm.
+
+    See Sveinn Steinarsson, "Downsampling Time Series for Visual Representation" (2013).
+
+    Parameters
+    ----------
+    x : float array
+        Must be sorted in ascending order.
+    y : float array
+    num_points : int
+        How many points to keep. Must be at least 3.
+
+    Returns
+    -------
+    int array
+        Sorted positions of the points to keep.
+    """
+    n = len(x)
+
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+
+    # The first and last points are always kept, and everything in between is split into
+    # num_points - 2 buckets that each contribute one point.
+    edges = (np.arange(num_points - 1) * ((n - 2) / (num_points - 2))).astype('int64') + 1
+    edges[-1] = n - 1
+
+    # Averages of each bucket, used as the third vertex of the triangles in the previous bucket.
+    # The last bucket's "next" vertex is the last point.
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    avg_x = np.append(sums_x / sizes, x[-1])
+    avg_y = np.append(sums_y / sizes, y[-1])
+
+    out = np.empty(num_points, dtype='int64')
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+
+    for i in range(num_points - 2):
+        lo = edges[i]
+        hi = edges[i + 1]
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        cx = avg_x[i + 1]
+        cy = avg_y[i + 1]
+        ax = x[a]
+        ay = y[a]
+
+        # Twice the triangle area. The constant factor doesn't change the argmax.
+        areas = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        a = lo + int(np.argmax(areas))
+        out[i + 1] = a
+
+    return out
+
+
+def _as_float(series):
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        values = series.to_numpy().view('int64').astype('float64')
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    return series.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def can_downsample(series):
+    """Whether a column can be used as a coordinate by lttb()."""
+    if pd.api.types.is_bool_dtype(series):
+        return False
+
+    return (
+        pd.api.types.is_numeric_dtype(series)
+        or pd.api.types.is_datetime64_any_dtype(series)
+        or pd.api.types.is_timedelta64_dtype(series))
+
+
+def lttb(data, x, y, num_points, by=None):
+    """Downsample each series in a DataFrame with LTTB.
+
+    Parameters
+    ----------
+    data : DataFrame
+    x : str
+        Column with the x coordinates. Must be numeric or datetime.
+    y : str or list of str
+        Column with the y coordinates. If a list, each column is treated as a separate series
+        sharing the same x, and the union of the points picked for each of them is kept.
+    num_points : int
+        Maximum number of points to keep per series.
+    by : str or None
+        Column that splits the rows into series, for long-format tables.
+
+    Returns
+    -------
+    DataFrame
+        The rows to keep, in their original order.
+    """
+    if isinstance(y, str):
+        y = [y]
+
+    if by is None:
+        groups = [np.arange(len(data))]
+    else:
+        groups = data.groupby(by, sort=False, observed=True).indices.values()
+
+    x_values = _as_float(data[x])
+    y_values = [_as_float(data[c]) for c in y]
+    keep = []
+
+    for positions in groups:
+        if len(positions) <= num_points:
+            keep.append(positions)
+            continue
+
+        gx = x_values[positions]
+
+        if not np.all(gx[1:] >= gx[:-1]):
+            order = np.argsort(gx, kind='stable')
+            positions = positions[order]
+            gx = gx[order]
+
+        for values in y_values:
+            gy = values[positions]
+            valid = ~(np.isnan(gx) | np.isnan(gy))
+            valid_positions = positions[valid]
+            picked = lttb_indices(gx[valid], gy[valid], num_points)
+            keep.append(valid_positions[picked])
+
+    keep = np.unique(np.concatenate(keep)) if keep else np.array([], dtype='int64')
+
+    if len(keep) == len(data):
+        return data
+
+    return data.take(keep)
+
+
+def decimate(data, num_points, by=None):
+    """Keep at most num_points evenly spaced rows from each series.
+
+    Parameters
+    ----------
+    data : DataFrame
+    num_points : int
+        Maximum number of rows to keep per series.
+    by : str or None
+        Column that splits the rows into series.
+
+    Returns
+    -------
+    DataFrame
+        The rows to keep, in their original order.
+    """
+    if by is None:
+        groups = [np.arange(len(data))]
+    else:
+        groups = data.groupby(by, sort=False, observed=True).indices.values()
+
+    keep = []
+
+    for positions in groups:
+        if len(positions) > num_points:
+            positions = positions[np.linspace(0, len(positions) - 1, num_points).astype('int64')]
+        keep.append(positions)
+
+    keep = np.sort(np.concatenate(keep)) if keep else np.array([], dtype='int64')
+
+    if len(keep) == len(data):
+        return data
+
+    return data.take(keep)
+
+
+def _from_float(values, like):
+    """Undo _as_float(), returning values of the same type as the series `like`."""
+    if pd.api.types.is_datetime64_any_dtype(like) or pd.api.types.is_timedelta64_dtype(like):
+        kind = 'M' if pd.api.types.is_datetime64_any_dtype(like) else 'm'
+        ints = np.where(np.isnan(values), 0, np.round(values)).astype('int64')
+        result = ints.view(f'{kind}8[{like.dt.unit}]')
+        result[np.isnan(values)] = np.array('NaT', dtype=result.dtype)
+
+        tz = getattr(like.dt, 'tz', None)
+        if tz is not None:
+            return pd.DatetimeIndex(result).tz_localize('UTC').tz_convert(tz)
+
+        return result
+
+    return values
+
+
+def bucket(data, x, by, num_buckets, count_name):
+    """Merge the rows of each series that fall in the same slice of the x axis.
+
+    The x range is split into num_buckets equal slices, so with one slice per few pixels the
+    result looks the same as the original, but has at most num_buckets rows per series.
+
+    Parameters
+    ----------
+    data : DataFrame
+    x : str
+        Column with the x coordinates. Must be numeric or datetime.
+    by : list of str
+        Columns that split the rows into series.
+    num_buckets : int
+    count_name : str
+        Name of the output column with the number of rows merged into each row.
+
+    Returns
+    -------
+    DataFrame
+        With the by columns, x, and count_name. Each row's x is the mean of the x values merged
+        into it, so slices holding a single row keep its exact position.
+    """
+    x_values = _as_float(data[x])
+    valid = ~np.isnan(x_values)
+
+    if valid.any():
+        lo = x_values[valid].min()
+        hi = x_values[valid].max()
+    else:
+        lo = hi = 0
+
+    step = (hi - lo) / num_buckets or 1
+
+    with np.errstate(invalid='ignore'):
+        index = np.minimum(np.floor((x_values - lo) / step), num_buckets - 1)
+
+    index = np.where(valid, index, 0).astype('int64')
+    num_groups = num_buckets
+    key_uniques = []
+
+    for c in by:
+        codes, uniques = pd.factorize(data[c], use_na_sentinel=False)
+        index = index + codes.astype('int64') * num_groups
+        num_groups *= max(1, len(uniques))
+        key_uniques.append(uniques)
+
+    index[~valid] = -1
+
+    keep = index >= 0
+    groups, inverse, counts = np.unique(index[keep], return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=x_values[keep], minlength=len(groups))
+
+    columns = {}
+    rest = groups // num_buckets
+
+    for c, uniques in zip(by, key_uniques):
+        rest, codes = np.divmod(rest, max(1, len(uniques)))
+        columns[c] = uniques.take(codes)
+
+    columns[x] = _from_float(sums / counts, data[x])
+    columns[count_name] = counts
+
+    return pd.DataFrame(columns)
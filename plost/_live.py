@@ -0,0 +1,391 @@
+"""Handles for charts that keep receiving data after they're drawn."""
+
+import collections
+import numbers
+
+import numpy as np
+import pandas as pd
+
+from . import _adapters
+from . import _downsample
+from . import _transport
+
+
+# What a chart function knows about how to feed new rows into its chart.
+#   reshape: callable that turns new rows into the shape of the chart's main dataset, or None if
+#     they already have that shape.
+#   x: column holding each row's position in time (or along the x axis), or None.
+#   series: column that splits the rows into series, or None.
+LivePlan = collections.namedtuple('LivePlan', ['reshape', 'x', 'series'])
+
+# Minimum number of rows to append to a chart with retention before redrawing it from scratch.
+_MIN_REDRAW_ROWS = 1000
+
+
+class LiveChart:
+    """A chart that was already drawn, and which can be updated with new rows.
+
+    Returned by line_chart(), area_chart(), scatter_chart() and event_chart(). Use add_rows() to
+    append data to the chart without rebuilding or resending what's already there, and retain()
+    to keep long-running charts from growing forever.
+    """
+
+    def __init__(self, element, spec, use_container_width, plan, encoders=None):
+        self._element = element
+        self._use_container_width = use_container_width
+        self._plan = plan
+        self._encoders = encoders or {}
+        self._retention = None
+
+        # Don't touch the caller's spec, since it may live in the cache.
+        self._spec = dict(spec)
+        self._spec['datasets'] = dict(spec.get('datasets', {}))
+
+        main = self._spec['datasets'][_transport.MAIN_DATASET]
+        self._targets = [_Target(_transport.MAIN_DATASET, main.columns, 1)]
+
+        for name, frame in self._spec['datasets'].items():
+            if name == _transport.MAIN_DATASET or not isinstance(frame, pd.DataFrame):
+                continue
+
+            # Other datasets, like the minimap's, hold a decimated copy of the main data. So
+            # keep decimating new rows at the same rate.
+            stride = max(1, len(main) // max(1, len(frame)))
+            self._targets.append(_Target(name, frame.columns, stride))
+
+    def add_rows(self, data):
+        """Append rows to the chart.
+
+        The new rows go through the same reshaping as the chart's original data (for example,
+        they get melted if y was a list of columns), and only they are sent to the browser.
+
+        Newer Streamlit versions have no way to append to a chart, so there the chart is drawn
+        again with all of its rows. Use retain() to bound how many rows that resends.
+
+        Parameters
+        ----------
+        data : DataFrame or pyarrow.Table or polars.DataFrame or polars.LazyFrame
+            New rows, with the same columns as the data originally passed to the chart.
+        """
+        rows = _adapters.to_pandas(data)
+
+        if self._plan.reshape is not None:
+            rows = self._plan.reshape(rows)
+
+        rows = _transport.encode_rows(rows, self._encoders)
+        can_add_rows = _supports_add_rows(self._element)
+
+        if self._retention is not None:
+            main_rows = self._targets[0].select(rows)
+            self._retention.extend(main_rows)
+            self._unsent += len(main_rows)
+
+            # The browser keeps every row it receives, so every once in a while replace the
+            # whole chart with only the rows we're retaining.
+            if not can_add_rows or self._unsent > self._redraw_rows:
+                self._redraw()
+                return
+
+        if not can_add_rows:
+            # Without add_rows, the only way to show new rows is to draw the chart again with all
+            # of them. Use retain() to bound how much that resends.
+            for target in self._targets:
+                target_rows = target.select(rows)
+                self._spec['datasets'][target.name] = pd.concat(
+                    [self._spec['datasets'][target.name], target_rows], ignore_index=True)
+
+            self._draw_again()
+            return
+
+        for target in self._targets:
+            target_rows = target.select(rows)
+
+            if len(target_rows):
+                self._element.add_rows(**{target.name: target_rows})
+
+    def retain(self, max_rows=None, time_window=None, summary_points=0):
+        """Limit how much data the chart holds, for charts that receive rows forever.
+
+        Rows are kept in a fixed-size ring buffer, and the oldest ones are evicted as new rows
+        arrive. The chart is redrawn with only the retained rows whenever the rows appended since
+        the last redraw outnumber them, so both Python and the browser use bounded memory.
+
+        Parameters
+        ----------
+        max_rows : int or None
+            Maximum number of rows to keep. When y is a list of columns, this counts the rows
+            after melting.
+        time_window : str or timedelta or number or None
+            Only keep rows whose x value is at most this far behind the newest one. For example,
+            '15min'. Use a number if x is not a datetime column.
+        summary_points : int
+            If greater than 0, evicted rows are not simply dropped. Instead, up to this many of
+            them (per series) are kept as a low-resolution summary of the chart's history.
+
+        Returns
+        -------
+        LiveChart
+            This same chart, so calls can be chained.
+        """
+        if max_rows is None and time_window is None:
+            raise ValueError('Specify max_rows or time_window.')
+
+        if time_window is not None and self._plan.x is None:
+            raise ValueError('time_window requires x to be a column name.')
+
+        main = self._spec['datasets'][_transport.MAIN_DATASET]
+
+        if time_window is not None and self._plan.x not in main.columns:
+            raise ValueError('time_window requires the x column to be sent to the chart.')
+
+        self._retention = _Retention(
+            main, max_rows, time_window, summary_points, self._plan.x, self._plan.series)
+        self._unsent = 0
+        self._redraw_rows = max(len(main), _MIN_REDRAW_ROWS)
+
+        if self._retention.extend(main):
+            self._redraw()
+
+        return self
+
+    def _redraw(self):
+        frame = self._retention.to_frame()
+        self._spec['datasets'][_transport.MAIN_DATASET] = frame
+
+        for target in self._targets[1:]:
+            self._spec['datasets'][target.name] = frame[target.columns].iloc[::target.stride]
+            target.offset = len(frame) % target.stride
+
+        self._draw_again()
+
+        self._unsent = 0
+        self._redraw_rows = max(len(frame), _MIN_REDRAW_ROWS)
+
+    def _draw_again(self):
+        # Calling a chart command on an element's DeltaGenerator replaces that element.
+        self._element = self._element.vega_lite_chart(
+            dict(self._spec), use_container_width=self._use_container_width)
+
+
+def _supports_add_rows(element):
+    """Whether a Streamlit element can append rows to its chart.
+
+    Checks the class rather than the instance, since newer DeltaGenerators answer every attribute
+    lookup with a function that raises StreamlitAPIException.
+    """
+    return callable(getattr(type(element), 'add_rows', None))
+
+
+class _Target:
+    """A dataset in the chart that new rows should be appended to."""
+
+    def __init__(self, name, columns, stride):
+        self.name = name
+        self.columns = list(columns)
+        self.stride = stride
+        self.offset = 0
+
+    def select(self, rows):
+        missing = [c for c in self.columns if c not in rows.columns]
+
+        if missing:
+            raise KeyError(f'New rows are missing columns used by the chart: {missing}')
+
+        rows = rows[self.columns]
+
+        if self.stride > 1:
+            positions = np.arange(len(rows))
+            rows = rows.iloc[(positions + self.offset) % self.stride == 0]
+            self.offset = (self.offset + len(positions)) % self.stride
+
+        return rows
+
+
+class _Retention:
+    """The rows a live chart keeps, plus an optional summary of the ones it evicted."""
+
+    def __init__(self, template, max_rows, time_window, summary_points, x, series):
+        if max_rows is None:
+            # Only bounded by time, so let the buffer grow to fit the window.
+            self._buffer = RingBuffer(template, _MIN_REDRAW_ROWS, growable=True)
+        else:
+            self._buffer = RingBuffer(template, max_rows)
+
+        self._time_window = time_window
+        self._summary_points = summary_points
+        self._summary = template.iloc[:0]
+        self._x = x
+        self._series = series if series in template.columns else None
+
+    def extend(self, rows):
+        """Add rows, evicting old ones as needed. Returns whether anything was evicted."""
+        evicted = [self._buffer.extend(rows)]
+
+        if self._time_window is not None and len(self._buffer):
+            x = self._buffer.column(self._x)
+            in_window = x >= _window_start(x, self._time_window)
+
+            # Rows arrive roughly in x order, so evict from the oldest up to the first row that
+            # is still inside the window.
+            expired = int(np.argmax(in_window)) if in_window.any() else len(x)
+            evicted.append(self._buffer.pop(expired))
+
+        evicted = [e for e in evicted if len(e)]
+
+        if evicted and self._summary_points > 0:
+            self._summary = pd.concat([self._summary, *evicted], ignore_index=True)
+
+            # Decimate in big steps so this doesn't run on every update.
+            if len(self._summary) > 2 * self._summary_points:
+                self._summary = _downsample.decimate(
+                    self._summary, self._summary_points, by=self._series)
+
+        return bool(evicted)
+
+    def to_frame(self):
+        frame = self._buffer.to_frame()
+
+        if len(self._summary):
+            frame = pd.concat([self._summary, frame], ignore_index=True)
+
+        return frame
+
+
+def _window_start(x, window):
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.max() - pd.Timedelta(window).to_timedelta64()
+
+    if not isinstance(window, numbers.Number):
+        # Datetimes sent as epoch milliseconds. See _transport.encode_dates().
+        window = pd.Timedelta(window) / pd.Timedelta(milliseconds=1)
+
+    return np.nanmax(x) - window
+
+
+class RingBuffer:
+    """First-in first-out queue of DataFrame rows, stored as one NumPy array per column.
+
+    Holds at most `capacity` rows, evicting the oldest ones when new rows don't fit. Unless
+    growable is True, in which case the buffer grows instead.
+    """
+
+    def __init__(self, template, capacity, growable=False):
+        self._columns = {c: _Column(template[c]) for c in template.columns}
+        self._capacity = max(1, int(capacity))
+        self._growable = growable
+        self._arrays = {c: col.empty(self._capacity) for (c, col) in self._columns.items()}
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _positions(self, start, count):
+        return (self._start + start + np.arange(count)) % self._capacity
+
+    def _grow(self, capacity):
+        order = self._positions(0, self._size)
+        arrays = {}
+
+        for c, col in self._columns.items():
+            arrays[c] = col.empty(capacity)
+            arrays[c][:self._size] = self._arrays[c][order]
+
+        self._arrays = arrays
+        self._capacity = capacity
+        self._start = 0
+
+    def extend(self, rows):
+        """Append rows. Returns the rows that were evicted to make room for them."""
+        n = len(rows)
+
+        if self._growable and self._size + n > self._capacity:
+            self._grow(max(2 * self._capacity, self._size + n))
+
+        overflow = max(0, self._size + n - self._capacity)
+        evicted = self.pop(min(overflow, self._size))
+
+        if n > self._capacity:
+            # Some of the new rows don't fit either.
+            evicted = pd.concat([evicted, rows.iloc[:n - self._capacity]], ignore_index=True)
+            rows = rows.iloc[n - self._capacity:]
+            n = self._capacity
+
+        positions = self._positions(self._size, n)
+
+        for c, col in self._columns.items():
+            self._arrays[c][positions] = col.encode(rows[c])
+
+        self._size += n
+        return evicted
+
+    def pop(self, count):
+        """Remove the oldest count rows and return them."""
+        popped = self._to_frame(self._positions(0, count))
+        self._start = (self._start + count) % self._capacity
+        self._size -= count
+        return popped
+
+    def column(self, name):
+        """Return the stored values of a column, oldest first."""
+        return self._arrays[name][self._positions(0, self._size)]
+
+    def to_frame(self):
+        """Return all rows, oldest first."""
+        return self._to_frame(self._positions(0, self._size))
+
+    def _to_frame(self, positions):
+        return pd.DataFrame(
+            {c: col.decode(self._arrays[c][positions]) for (c, col) in self._columns.items()},
+            copy=False)
+
+
+class _Column:
+    """Converts a DataFrame column to and from a plain NumPy array, keeping its dtype."""
+
+    def __init__(self, series):
+        self.dtype = series.dtype
+
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            self.storage = np.dtype('int32')
+        elif isinstance(self.dtype, pd.DatetimeTZDtype):
+            self.storage = np.dtype(f'datetime64[{self.dtype.unit}]')
+        elif isinstance(self.dtype, np.dtype):
+            self.storage = self.dtype
+        elif _is_nullable_number(self.dtype):
+            # Nullable numbers, like Int64. NaN stands for missing values.
+            self.storage = np.dtype('float64')
+        else:
+            self.storage = np.dtype(object)
+
+    def empty(self, capacity):
+        return np.empty(capacity, dtype=self.storage)
+
+    def encode(self, series):
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            new = pd.Index(series.dropna().unique()).difference(self.dtype.categories, sort=False)
+
+            if len(new):
+                # Append, so the codes already stored keep their meaning.
+                self.dtype = pd.CategoricalDtype(
+                    self.dtype.categories.append(new), ordered=self.dtype.ordered)
+
+            return pd.Categorical(series, dtype=self.dtype).codes
+        if isinstance(self.dtype, pd.DatetimeTZDtype):
+            return series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype=self.storage)
+        if self.dtype != self.storage and self.storage != object:
+            return series.to_numpy(dtype=self.storage, na_value=np.nan)
+        return series.to_numpy(dtype=self.storage)
+
+    def decode(self, values):
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            return pd.Categorical.from_codes(values, dtype=self.dtype)
+        if isinstance(self.dtype, pd.DatetimeTZDtype):
+            return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(self.dtype.tz)
+        if self.storage == object or self.dtype != self.storage:
+            return pd.array(values, dtype=self.dtype)
+        return values
+
+
+def _is_nullable_number(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
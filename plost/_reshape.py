@@ -0,0 +1,71 @@
+"""Helpers that reshape DataFrames between wide and long formats."""
+
+import numpy as np
+import pandas as pd
+
+
+def melt(data, id_vars, value_vars, var_name, value_name):
+    """Unpivot a DataFrame from wide to long format. Same result as DataFrame.melt, but leaner.
+
+    Compared to DataFrame.melt, the variable column is a Categorical backed by small integer
+    codes rather than an object column repeating each series name, and every output column is
+    written directly into its final array without intermediate copies.
+
+    Parameters
+    ----------
+    data : DataFrame
+    id_vars : list of str
+        Columns to repeat for each series.
+    value_vars : list of str
+        Columns to unpivot. Each one becomes a series.
+    var_name : str
+        Name of the output column holding the series names.
+    value_name : str
+        Name of the output column holding the series values.
+
+    Returns
+    -------
+    DataFrame
+    """
+    value_vars = list(value_vars)
+
+    if len(set(value_vars)) != len(value_vars):
+        # Categoricals need unique categories.
+        return data.melt(
+            id_vars=id_vars, value_vars=value_vars, var_name=var_name, value_name=value_name)
+
+    n = len(data)
+    k = len(value_vars)
+    columns = {}
+    tiled_index = None
+
+    for c in id_vars:
+        col = data[c]
+
+        if isinstance(col.dtype, np.dtype):
+            columns[c] = np.tile(col.to_numpy(), k)
+        else:
+            # Extension arrays (tz-aware datetimes, categoricals, etc) don't support np.tile.
+            if tiled_index is None:
+                tiled_index = np.tile(np.arange(n), k)
+            columns[c] = col.array.take(tiled_index)
+
+    # Same code types as Pandas uses for Categoricals, so from_codes doesn't copy them.
+    codes_dtype = 'int8' if k < 2 ** 7 else 'int16' if k < 2 ** 15 else 'int32'
+    codes = np.repeat(np.arange(k, dtype=codes_dtype), n)
+    columns[var_name] = pd.Categorical.from_codes(codes, categories=pd.Index(value_vars))
+
+    value_cols = [data[c] for c in value_vars]
+    dtype = value_cols[0].dtype if value_cols else np.dtype('float64')
+
+    if isinstance(dtype, np.dtype) and all(c.dtype == dtype for c in value_cols):
+        values = np.empty(n * k, dtype=dtype)
+        for i, col in enumerate(value_cols):
+            values[i * n:(i + 1) * n] = col.to_numpy()
+    else:
+        # Mixed types. Let Pandas find a common type, like DataFrame.melt does.
+        values = pd.concat(value_cols, ignore_index=True).array
+
+    columns[value_name] = values
+
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,35 @@
+"""Inference of Vega-Lite encoding types from DataFrame dtypes."""
+
+import pandas as pd
+
+
+def vega_type(dtype):
+    """Return the Vega-Lite type that best describes values of a Pandas or NumPy dtype.
+
+    Never returns None. Types without a better match are 'nominal', since Vega-Lite can draw
+    anything as a category.
+    """
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'nominal'
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'ordinal' if dtype.ordered else 'nominal'
+
+    if isinstance(dtype, pd.PeriodDtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'temporal'
+
+    if pd.api.types.is_timedelta64_dtype(dtype):
+        return 'quantitative'
+
+    if pd.api.types.is_complex_dtype(dtype):
+        return 'nominal'
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'quantitative'
+
+    return 'nominal'
+
+
+def infer_types(data):
+    """Return a dict mapping each column of a DataFrame to its Vega-Lite type."""
+    return {c: vega_type(t) for (c, t) in data.dtypes.items()}
@@ -0,0 +1,663 @@
+"""Helpers that prepare a chart's data before it gets sent to the browser."""
+
+import functools
+import logging
+import numbers
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Keys whose values hold data rather than spec, so there's no need to walk into them.
+_DATA_KEYS = {'data', 'datasets'}
+
+# Keys whose values are lists of field names.
+_FIELD_LIST_KEYS = {'fold', 'groupby'}
+
+# Matches "datum.foo" and "datum['foo']" inside Vega expressions.
+_DATUM_RE = re.compile(r'''datum(?:\.([A-Za-z_$][\w$]*)|\[\s*(['"])(.*?)\2\s*\])''')
+
+
+def referenced_fields(spec):
+    """Return the set of field names a Vega-Lite spec reads from its data."""
+    fields = set()
+    _collect_fields(spec, fields)
+    return fields
+
+
+def _collect_fields(obj, fields):
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k in _DATA_KEYS:
+                continue
+
+            if k == 'field' and isinstance(v, str):
+                _add_field(fields, v)
+
+            elif k in _FIELD_LIST_KEYS and isinstance(v, (list, tuple)):
+                for f in v:
+                    if isinstance(f, str):
+                        _add_field(fields, f)
+
+            else:
+                _collect_fields(v, fields)
+
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            _collect_fields(v, fields)
+
+    elif isinstance(obj, str) and 'datum' in obj:
+        # Expressions, like the ones in conditions or calculate transforms.
+        for m in _DATUM_RE.finditer(obj):
+            fields.add(m.group(1) or m.group(3))
+
+
+def _add_field(fields, field):
+    # Vega-Lite uses backslashes to escape dots and brackets in field names, and unescaped
+    # dots to access nested properties. Keep both the column name and the nested root.
+    unescaped = re.sub(r'\\(.)', r'\1', field)
+    fields.add(unescaped)
+
+    root = re.split(r'(?<!\\)[.\[]', field, maxsplit=1)[0]
+    fields.add(re.sub(r'\\(.)', r'\1', root))
+
+
+# Name of the dataset holding the chart's top-level data.
+MAIN_DATASET = 'data'
+
+
+def name_datasets(spec):
+    """Move every DataFrame in the spec into the top-level datasets and reference it by name.
+
+    DataFrames can appear as the "data" of the top-level spec or of any view, layer or concat
+    inside it. Each distinct DataFrame object gets exactly one entry in "datasets", so it is
+    serialized and parsed only once no matter how many views use it. The top-level DataFrame is
+    named MAIN_DATASET.
+
+    Returns a copy of the spec. DataFrames themselves are not copied.
+    """
+    datasets = dict(spec.get('datasets', {}))
+    names = {id(v): k for (k, v) in datasets.items()}
+
+    def get_name(frame):
+        key = id(frame)
+
+        if key not in names:
+            name = MAIN_DATASET
+            i = len(datasets)
+            while name in datasets:
+                name = f'{MAIN_DATASET}_{i}'
+                i += 1
+
+            names[key] = name
+            datasets[name] = frame
+
+        return names[key]
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            out = {}
+            for k, v in obj.items():
+                if k == 'datasets':
+                    continue
+                elif k == 'data' and isinstance(v, pd.DataFrame):
+                    out[k] = dict(name=get_name(v))
+                elif k == 'data':
+                    out[k] = v
+                else:
+                    out[k] = walk(v)
+            return out
+
+        if isinstance(obj, (list, tuple)):
+            return [walk(v) for v in obj]
+
+        return obj
+
+    # Name the top-level data first, so it gets MAIN_DATASET.
+    top_data = spec.get('data')
+    if isinstance(top_data, pd.DataFrame):
+        get_name(top_data)
+
+    spec = walk(spec)
+
+    if datasets:
+        spec['datasets'] = datasets
+
+    return spec
+
+
+def project_columns(spec):
+    """Drop all DataFrame columns that the spec does not reference.
+
+    Returns a shallow copy of the spec where the top-level data and datasets only contain the
+    columns that some encoding, transform or expression actually uses. DataFrames with any
+    non-string column label are left whole.
+    """
+    fields = referenced_fields(spec)
+    spec = dict(spec)
+
+    if 'data' in spec:
+        spec['data'] = _project(spec['data'], fields)
+
+    if 'datasets' in spec:
+        spec['datasets'] = {k: _project(v, fields) for (k, v) in spec['datasets'].items()}
+
+    return spec
+
+
+def _project(data, fields):
+    if not isinstance(data, pd.DataFrame):
+        return data
+
+    if not all(isinstance(c, str) for c in data.columns):
+        # Fields can only name string columns, and how other labels (ints, tuples) end up named
+        # in the browser is up to Streamlit. So don't risk dropping columns the chart uses.
+        return data
+
+    columns = [c for c in data.columns if c in fields]
+
+    if len(columns) == len(data.columns):
+        return data
+
+    return data[columns]
+
+
+def encode_rows(rows, encoders):
+    """Convert new rows for a dataset the same way the dataset itself was converted.
+
+    Parameters
+    ----------
+    rows : DataFrame
+    encoders : dict
+        Maps column names to functions that take and return a Series, as filled in by
+        quantize() and the other conversion stages.
+
+    Returns
+    -------
+    DataFrame
+    """
+    columns = [c for c in rows.columns if c in encoders]
+
+    if not columns:
+        return rows
+
+    rows = rows.copy(deep=False)
+
+    for c in columns:
+        rows[c] = encoders[c](rows[c])
+
+    return rows
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Channels that map a field to a position, and the view dimension they span.
+_POSITION_CHANNELS = {'x': 'width', 'x2': 'width', 'y': 'height', 'y2': 'height'}
+
+# Chart size to assume when the spec doesn't say. Streamlit usually stretches charts to the
+# container width, so this errs on the wide side.
+_DEFAULT_PIXELS = {'width': 1000, 'height': 400}
+
+# How many distinct values to keep per pixel. More than 1 so zooming in a little still looks right.
+_SUBPIXELS = 10
+
+# Float32 can represent integers up to this exactly.
+_FLOAT32_EXACT = 2 ** 24
+
+
+def quantize(spec, encoders, live=False):
+    """Shrink numeric columns by rounding positions to what can be drawn, then downcasting.
+
+    Quantitative fields that are only used as unaggregated, unbinned x/y positions are rounded to
+    a power of 10 derived from their extent and the size of the chart in pixels, with _SUBPIXELS
+    values per pixel. They are then stored as float32 if that represents the rounded values
+    well. Integer columns are stored in the narrowest integer type that fits them, and other
+    float columns become float32 if that loses nothing.
+
+    Parameters
+    ----------
+    spec : dict
+        A spec whose data was already moved into its datasets. See name_datasets().
+    encoders : dict
+        Filled in with functions that convert new rows the same way. See encode_rows().
+    live : bool
+        If True, integer columns keep their type. New rows appended to live charts must have
+        the same types as the rows already sent, and might not fit in a narrower integer.
+
+    Returns
+    -------
+    dict
+        A shallow copy of the spec with the converted datasets.
+    """
+    datasets = spec.get('datasets')
+
+    if not datasets:
+        return spec
+
+    positions = {}
+    other_uses = set()
+    _collect_position_uses(spec, _DEFAULT_PIXELS, positions, other_uses)
+
+    frames = {k: v for (k, v) in datasets.items() if isinstance(v, pd.DataFrame)}
+    columns = {c for frame in frames.values() for c in frame.columns}
+    conversions = {}
+
+    for c in columns:
+        series = [frame[c] for frame in frames.values() if c in frame.columns]
+        dtype = series[0].dtype
+
+        if not all(s.dtype == dtype for s in series) or not isinstance(dtype, np.dtype):
+            continue
+
+        decimals = None
+
+        if c in positions and c not in other_uses and dtype.kind == 'f':
+            decimals = _position_decimals(series, positions[c])
+
+        if live and dtype.kind in 'iu':
+            new_dtype = None
+        else:
+            new_dtype = _narrowest_dtype(series, decimals)
+
+        if decimals is not None or new_dtype is not None:
+            conversions[c] = functools.partial(
+                _convert, decimals=decimals, dtype=new_dtype or dtype)
+
+    if not conversions:
+        return spec
+
+    nbytes_before = _nbytes(frames)
+
+    for c, convert in conversions.items():
+        encoders[c] = convert
+
+    spec = dict(spec)
+    spec['datasets'] = {
+        k: encode_rows(v, conversions) if k in frames else v for (k, v) in datasets.items()}
+
+    nbytes_after = _nbytes({k: spec['datasets'][k] for k in frames})
+    _LOGGER.info(
+        'Quantizing chart data saved %d of %d bytes (%.0f%%).',
+        nbytes_before - nbytes_after, nbytes_before,
+        100 * (nbytes_before - nbytes_after) / max(1, nbytes_before))
+
+    return spec
+
+
+def _nbytes(frames):
+    return sum(int(f.memory_usage(index=False, deep=True).sum()) for f in frames.values())
+
+
+def _collect_position_uses(obj, pixels, positions, other_uses):
+    """Find which fields are drawn as plain positions, and how many pixels they span at most."""
+    if isinstance(obj, (list, tuple)):
+        for v in obj:
+            _collect_position_uses(v, pixels, positions, other_uses)
+        return
+
+    if not isinstance(obj, dict):
+        return
+
+    pixels = dict(pixels)
+    for dim in pixels:
+        if isinstance(obj.get(dim), numbers.Number):
+            pixels[dim] = obj[dim]
+
+    for channel, enc in (obj.get('encoding') or {}).items():
+        if not isinstance(enc, dict) or not isinstance(enc.get('field'), str):
+            continue
+
+        field = enc['field']
+        dim = _POSITION_CHANNELS.get(channel)
+        is_plain = not any(enc.get(k) for k in ('aggregate', 'bin', 'timeUnit'))
+
+        if dim and is_plain and enc.get('type') == 'quantitative':
+            positions[field] = max(positions.get(field, 0), pixels[dim])
+        else:
+            other_uses.add(field)
+
+    # Transforms (fold, aggregate, filters...) may compute with the exact values.
+    other_uses.update(referenced_fields(obj.get('transform', [])))
+
+    for k, v in obj.items():
+        if k not in _DATA_KEYS and k not in ('encoding', 'transform'):
+            _collect_position_uses(v, pixels, positions, other_uses)
+
+
+def _position_decimals(series, pixels):
+    values = np.concatenate([s.to_numpy() for s in series])
+    values = values[np.isfinite(values)]
+
+    if not len(values):
+        return None
+
+    extent = values.max() - values.min()
+
+    if extent <= 0:
+        return None
+
+    return -int(np.floor(np.log10(extent / (pixels * _SUBPIXELS))))
+
+
+def _narrowest_dtype(series, decimals):
+    """Return a smaller dtype that can hold the (rounded) values, or None."""
+    dtype = series[0].dtype
+    values = [s.to_numpy() for s in series if len(s)]
+
+    if not values:
+        return None
+
+    if dtype.kind in 'iu':
+        lo = min(v.min() for v in values)
+        hi = max(v.max() for v in values)
+
+        for candidate in ('int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32'):
+            candidate = np.dtype(candidate)
+            info = np.iinfo(candidate)
+
+            if info.min <= lo and hi <= info.max:
+                return candidate if candidate.itemsize < dtype.itemsize else None
+
+        return None
+
+    if dtype != np.float64:
+        return None
+
+    if decimals is not None:
+        # Rounded values are multiples of 10**-decimals, which float32 represents well as long as
+        # there aren't more of those steps than its mantissa can count.
+        magnitude = max(np.abs(v[np.isfinite(v)]).max(initial=0) for v in values)
+        if magnitude * 10.0 ** decimals < _FLOAT32_EXACT:
+            return np.dtype('float32')
+        return None
+
+    # Only downcast other floats when that's lossless.
+    for v in values:
+        with np.errstate(over='ignore'):
+            narrowed = v.astype('float32')
+        if not np.array_equal(narrowed.astype('float64'), v, equal_nan=True):
+            return None
+
+    return np.dtype('float32')
+
+
+def _convert(series, decimals, dtype):
+    values = series.to_numpy()
+
+    if decimals is not None:
+        values = np.round(values, decimals)
+
+    return pd.Series(values.astype(dtype, copy=False), index=series.index, name=series.name)
+
+
+def encode_dates(spec, encoders):
+    """Send datetime columns drawn as dates as integer milliseconds since the epoch.
+
+    Numbers are cheaper to serialize and for the browser to turn into dates than formatted
+    strings. This applies to fields of type 'temporal', and to fields with a timeUnit whatever
+    their type (like time_hist()'s ordinal ones).
+
+    Timezone-aware columns are converted to UTC first, and timezone-naive ones are taken to be in
+    UTC already, which is how Vega-Lite reads numeric dates. The exception is fields with a local
+    timeUnit (like 'day' rather than 'utcday'), which Vega-Lite extracts in the browser's timezone.
+    Those are sent as their wall-clock time read as UTC, and their timeUnit switched to the UTC
+    one, so they land in the same bins as in the DataFrame no matter where the browser is. Fields
+    used both ways, or with a timeUnit that isn't a plain string, are left alone.
+
+    Each data reference using a converted dataset gets a format.parse hint, so Vega-Lite knows
+    those fields are dates.
+
+    Parameters
+    ----------
+    spec : dict
+        A spec whose data was already moved into its datasets. See name_datasets().
+    encoders : dict
+        Filled in with functions that convert new rows the same way. See encode_rows().
+
+    Returns
+    -------
+    dict
+        A copy of the spec with the converted datasets.
+    """
+    datasets = spec.get('datasets')
+
+    if not datasets:
+        return spec
+
+    kinds = {}
+    _collect_date_fields(spec, kinds)
+
+    converters = {
+        field: _to_epoch_ms if kind == {'instant'} else _to_wall_clock_ms
+        for (field, kind) in kinds.items()
+        if kind in ({'instant'}, {'wall_clock'})}
+
+    converted = {}
+
+    for name, frame in datasets.items():
+        if not isinstance(frame, pd.DataFrame):
+            continue
+
+        columns = [
+            c for c in frame.columns
+            if c in converters and pd.api.types.is_datetime64_any_dtype(frame[c])]
+
+        if columns:
+            converted[name] = columns
+
+    if not converted:
+        return spec
+
+    wall_clock = set()
+
+    for columns in converted.values():
+        for c in columns:
+            encoders[c] = converters[c]
+
+            if converters[c] is _to_wall_clock_ms:
+                wall_clock.add(c)
+
+    spec = dict(spec)
+    spec['datasets'] = {
+        k: encode_rows(v, encoders) if k in converted else v for (k, v) in datasets.items()}
+
+    if wall_clock:
+        spec = _use_utc_time_units(spec, wall_clock)
+
+    return _add_date_parsing(spec, converted)
+
+
+def _date_kind(enc):
+    """How an encoding reads dates from its field: 'instant', 'wall_clock', None or '?'."""
+    time_unit = enc.get('timeUnit')
+
+    if time_unit is None:
+        return 'instant' if enc.get('type') == 'temporal' else None
+
+    if not isinstance(time_unit, str):
+        return '?'
+
+    return 'instant' if time_unit.startswith('utc') else 'wall_clock'
+
+
+def _collect_date_fields(obj, kinds):
+    if isinstance(obj, (list, tuple)):
+        for v in obj:
+            _collect_date_fields(v, kinds)
+        return
+
+    if not isinstance(obj, dict):
+        return
+
+    for k, v in obj.items():
+        if k in _DATA_KEYS:
+            continue
+
+        if k == 'encoding' and isinstance(v, dict):
+            for enc in v.values():
+                if not isinstance(enc, dict) or not isinstance(enc.get('field'), str):
+                    continue
+
+                kind = _date_kind(enc)
+
+                if kind is not None:
+                    kinds.setdefault(enc['field'], set()).add(kind)
+
+        _collect_date_fields(v, kinds)
+
+
+def _use_utc_time_units(obj, fields):
+    if isinstance(obj, (list, tuple)):
+        return [_use_utc_time_units(v, fields) for v in obj]
+
+    if not isinstance(obj, dict):
+        return obj
+
+    out = {}
+
+    for k, v in obj.items():
+        if k in _DATA_KEYS:
+            out[k] = v
+
+        elif k == 'encoding' and isinstance(v, dict):
+            out[k] = {
+                channel: (
+                    {**enc, 'timeUnit': 'utc' + enc['timeUnit']}
+                    if isinstance(enc, dict) and enc.get('field') in fields
+                    and _date_kind(enc) == 'wall_clock'
+                    else _use_utc_time_units(enc, fields))
+                for (channel, enc) in v.items()}
+
+        else:
+            out[k] = _use_utc_time_units(v, fields)
+
+    return out
+
+
+def _to_epoch_ms(series):
+    if getattr(series.dt, 'tz', None) is not None:
+        series = series.dt.tz_convert(None)
+
+    values = series.to_numpy().astype('datetime64[ms]').view('int64')
+    mask = series.isna().to_numpy()
+
+    return pd.Series(
+        pd.arrays.IntegerArray(values, mask), index=series.index, name=series.name, copy=False)
+
+
+def _to_wall_clock_ms(series):
+    if getattr(series.dt, 'tz', None) is not None:
+        series = series.dt.tz_localize(None)
+
+    return _to_epoch_ms(series)
+
+
+def _add_date_parsing(obj, converted):
+    if isinstance(obj, (list, tuple)):
+        return [_add_date_parsing(v, converted) for v in obj]
+
+    if not isinstance(obj, dict):
+        return obj
+
+    out = {}
+
+    for k, v in obj.items():
+        if k == 'datasets':
+            out[k] = v
+
+        elif k == 'data' and isinstance(v, dict) and v.get('name') in converted:
+            fmt = dict(v.get('format', {}))
+            fmt['parse'] = {
+                **fmt.get('parse', {}), **{c: 'date' for c in converted[v['name']]}}
+            out[k] = {**v, 'format': fmt}
+
+        else:
+            out[k] = _add_date_parsing(v, converted)
+
+    return out
+
+
+# Only dictionary-encode columns where each distinct value appears at least this many times on
+# average, or the dictionary itself would be a large part of the column.
+_MIN_REPETITION = 4
+
+
+def encode_dictionaries(spec, encoders):
+    """Send string columns with few distinct values as categoricals.
+
+    Streamlit serializes categoricals as Arrow dictionary arrays: one small integer code per row
+    plus a single copy of each distinct string. The browser decodes them back into the same
+    strings, so legends, colors and tooltips look exactly the same.
+
+    Parameters
+    ----------
+    spec : dict
+        A spec whose data was already moved into its datasets. See name_datasets().
+    encoders : dict
+        Filled in with functions that convert new rows the same way. See encode_rows().
+
+    Returns
+    -------
+    dict
+        A shallow copy of the spec with the converted datasets.
+    """
+    datasets = spec.get('datasets')
+
+    if not datasets:
+        return spec
+
+    frames = {k: v for (k, v) in datasets.items() if isinstance(v, pd.DataFrame)}
+    columns = {c for frame in frames.values() for c in frame.columns}
+    conversions = {}
+
+    for c in columns:
+        series = [frame[c] for frame in frames.values() if c in frame.columns]
+
+        if not all(_is_string_column(s) for s in series):
+            continue
+
+        categories = pd.Index(pd.concat(series, ignore_index=True).dropna().unique())
+        num_rows = sum(len(s) for s in series)
+
+        if len(categories) * _MIN_REPETITION <= num_rows:
+            conversions[c] = _Dictionary(categories)
+
+    if not conversions:
+        return spec
+
+    encoders.update(conversions)
+
+    spec = dict(spec)
+    spec['datasets'] = {
+        k: encode_rows(v, conversions) if k in frames else v for (k, v) in datasets.items()}
+
+    return spec
+
+
+def _is_string_column(series):
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        return True
+
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+
+class _Dictionary:
+    """Converts string columns to categoricals, growing its categories as new values show up.
+
+    Categories are only ever appended, so the codes of values that were already sent don't
+    change.
+    """
+
+    def __init__(self, categories):
+        self.categories = categories
+
+    def __call__(self, series):
+        new = pd.Index(series.dropna().unique()).difference(self.categories, sort=False)
+
+        if len(new):
+            self.categories = self.categories.append(new)
+
+        return pd.Series(
+            pd.Categorical(series, categories=self.categories),
+            index=series.index, name=series.name, copy=False)
@@ -0,0 +1,119 @@
+"""Slicing of the rows that fall inside the visible part of a chart."""
+
+import numpy as np
+import pandas as pd
+
+
+def can_slice(series):
+    """Whether a column can be sliced by visible_rows()."""
+    if pd.api.types.is_bool_dtype(series):
+        return False
+
+    return (
+        pd.api.types.is_numeric_dtype(series)
+        or pd.api.types.is_datetime64_any_dtype(series)
+        or pd.api.types.is_timedelta64_dtype(series))
+
+
+def is_sorted(data, column):
+    """Whether a column of a DataFrame is sorted in ascending order, with no missing values.
+
+    Not cached, since in-place edits can unsort a column without changing anything cheap to
+    check. It's one pass over the column, which is small next to the rest of the chart.
+    """
+    # Pandas says columns with missing values are not monotonic.
+    return bool(data[column].is_monotonic_increasing)
+
+
+def to_scalar(series, value):
+    """Convert a range endpoint to a value comparable with a column.
+
+    Timezone-naive endpoints of timezone-aware columns are taken to be in the column's timezone,
+    and timezone-aware endpoints of timezone-naive columns are converted to UTC.
+    """
+    if value is None:
+        return None
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        value = pd.Timestamp(value)
+        tz = series.dt.tz
+
+        if tz is not None:
+            return value.tz_localize(tz) if value.tz is None else value.tz_convert(tz)
+
+        return value if value.tz is None else value.tz_convert('UTC').tz_localize(None)
+
+    if pd.api.types.is_timedelta64_dtype(series):
+        return pd.Timedelta(value)
+
+    return value
+
+
+def _searchable(series, value):
+    """Return the column as a NumPy array, and an endpoint to search for in it."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if series.dt.tz is not None:
+            # Doesn't copy: timezone-aware values are stored in UTC.
+            series = series.dt.tz_convert(None)
+            value = value.tz_convert(None)
+
+        return series.to_numpy(), np.datetime64(value.as_unit(series.dt.unit).asm8)
+
+    if pd.api.types.is_timedelta64_dtype(series):
+        return series.to_numpy(), np.timedelta64(value.as_unit(series.dt.unit).asm8)
+
+    return series.to_numpy(), value
+
+
+def visible_rows(data, column, start, end, margin=0):
+    """Keep only the rows of a DataFrame whose column value is between start and end.
+
+    Sorted columns (see is_sorted()) are searched with bisection, so the cost only depends on the
+    number of rows kept. These also keep the row just outside each end, so lines reach the edges
+    of the chart. Other columns are filtered with a mask over every row.
+
+    Parameters
+    ----------
+    data : DataFrame
+    column : str
+        Numeric, datetime or timedelta column. See can_slice().
+    start, end : any or None
+        Ends of the range, inclusive. None means unbounded.
+    margin : number
+        How much to widen the range on both sides, as a fraction of its width. So panning a
+        little doesn't reveal an empty chart. Ignored if start or end is None.
+
+    Returns
+    -------
+    DataFrame
+    """
+    series = data[column]
+    start = to_scalar(series, start)
+    end = to_scalar(series, end)
+
+    if margin and start is not None and end is not None:
+        pad = (end - start) * margin
+        start, end = start - pad, end + pad
+
+    if not is_sorted(data, column):
+        keep = pd.Series(True, index=data.index)
+
+        if start is not None:
+            keep &= series >= start
+        if end is not None:
+            keep &= series <= end
+
+        return data[keep.to_numpy()]
+
+    n = len(data)
+    lo, hi = 0, n
+
+    if start is not None:
+        values, value = _searchable(series, start)
+        lo = max(int(np.searchsorted(values, value, side='left')) - 1, 0)
+
+    if end is not None:
+        values, value = _searchable(series, end)
+        hi = min(int(np.searchsorted(values, value, side='right')) + 1, n)
+
+    return data.iloc[lo:max(lo, hi)]
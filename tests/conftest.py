@@ -0,0 +1,27 @@
+import pytest
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+
+import plost
+
+
+@pytest.fixture(autouse=True)
+def clear_plost_cache():
+    plost.clear_cache()
+    yield
+    plost.clear_cache()
+
+
+@pytest.fixture
+def drawn_specs(monkeypatch):
+    """Record every spec drawn with a real DeltaGenerator, in order."""
+    specs = []
+    original = DeltaGenerator.vega_lite_chart
+
+    def vega_lite_chart(self, spec=None, *args, **kwargs):
+        specs.append(spec)
+        return original(self, spec, *args, **kwargs)
+
+    monkeypatch.setattr(DeltaGenerator, 'vega_lite_chart', vega_lite_chart)
+    monkeypatch.setattr(st, 'vega_lite_chart', st._main.vega_lite_chart)
+    return specs
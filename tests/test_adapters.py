@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import plost
+from plost import _adapters
+
+
+def make_table():
+    return pa.table(dict(
+        x=[1.0, 2.0, 3.0],
+        y=[4, 5, 6],
+        name=['a', 'b', 'a'],
+        unused=[[1], [2], [3]],
+    ))
+
+
+def test_referenced_columns():
+    args = ('x', ['y', 'name:N'])
+    kwargs = dict(color=dict(field='c'), opacity=0.5, title=None)
+
+    assert _adapters.referenced_columns(args, kwargs) == {'x', 'y', 'name', 'name:N', 'c'}
+
+
+def test_to_pandas_only_converts_referenced_columns():
+    frame = _adapters.to_pandas(make_table(), {'x', 'name', 'not a column'})
+
+    assert list(frame.columns) == ['x', 'name']
+    assert list(frame['name']) == ['a', 'b', 'a']
+
+
+def test_to_pandas_leaves_other_data_alone():
+    data = pd.DataFrame(dict(x=[1]))
+
+    assert _adapters.to_pandas(data, {'x'}) is data
+    assert _adapters.to_pandas(None) is None
+
+
+def test_polars_frames():
+    pl = pytest.importorskip('polars')
+    frame = pl.DataFrame(dict(x=[1.0, 2.0], y=[3, 4], unused=['a', 'b']))
+
+    for data in [frame, frame.lazy()]:
+        assert list(_adapters.to_pandas(data, {'x', 'y'}).columns) == ['x', 'y']
+
+
+def test_charts_accept_arrow_tables(monkeypatch):
+    drawn = []
+    monkeypatch.setattr(
+        plost.st, 'vega_lite_chart', lambda spec, use_container_width=False: drawn.append(spec))
+
+    plost.line_chart(make_table(), 'x', 'y', color='name', pan_zoom=None)
+
+    sent = drawn[-1]['datasets']['data']
+    assert isinstance(sent, pd.DataFrame)
+    assert sorted(sent.columns) == ['name', 'x', 'y']
+    assert list(sent['y']) == [4, 5, 6]
+
+
+def make_frame(n=200):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(dict(
+        t=pd.date_range('2024-01-01', periods=n, freq='min'),
+        a=rng.standard_normal(n).cumsum(),
+        series=np.array(['s1', 's2', 's3', 's4'])[np.arange(n) % 4],
+        share=np.array([100, 50, 2, 1])[np.arange(n) % 4],
+    ))
+
+
+CHARTS = {
+    'line': lambda d: plost.line_chart(d, 't', 'a', color='series'),
+    'bar': lambda d: plost.bar_chart(d, 'series', 'share'),
+    'pie': lambda d: plost.pie_chart(d, 'share', 'series'),
+    'scatter': lambda d: plost.scatter_chart(d, 'a', 'share', color='series'),
+}
+
+
+@pytest.mark.parametrize('name', list(CHARTS))
+def test_arrow_tables_draw_like_dataframes(monkeypatch, name):
+    drawn = []
+    monkeypatch.setattr(
+        plost.st, 'vega_lite_chart', lambda spec, use_container_width=False: drawn.append(spec))
+
+    data = make_frame()
+    CHARTS[name](data)
+    CHARTS[name](pa.Table.from_pandas(data, preserve_index=False))
+
+    expected, actual = drawn
+    assert expected.get('encoding') == actual.get('encoding')
+
+    for dataset, frame in expected['datasets'].items():
+        pd.testing.assert_frame_equal(
+            frame.reset_index(drop=True), actual['datasets'][dataset].reset_index(drop=True),
+            check_dtype=False, check_categorical=False)
@@ -0,0 +1,234 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plost import _aggregate
+
+
+# Reference implementations -----------------------------------------------------------------------
+
+def _js_day(d):
+    """Date.getDay(): 0 for Sunday."""
+    return (d.weekday() + 1) % 7
+
+
+def _js_date(year, month, day, hours=0, minutes=0, seconds=0, ms=0):
+    """new Date(year, month, day, ...), where month and day may be out of range."""
+    start = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+    return start + datetime.timedelta(
+        days=day - 1, hours=hours, minutes=minutes, seconds=seconds, milliseconds=ms)
+
+
+def _week_num(d):
+    """Number of Sundays from January 1st to d, inclusive. Counted one day at a time."""
+    day = datetime.date(d.year, 1, 1)
+    count = 0
+
+    while day <= d.date():
+        count += _js_day(day) == 0
+        day += datetime.timedelta(days=1)
+
+    return count
+
+
+def vega_floor(d, parts):
+    """Row-by-row port of vega-time's floor()."""
+    def weekday(w, day, first_day):
+        return day + w * 7 - (first_day + 6) % 7
+
+    def first(y):
+        return _js_day(datetime.date(y, 1, 1))
+
+    year = d.year if 'year' in parts else 2012
+    month = (
+        d.month - 1 if 'month' in parts
+        else 3 * ((d.month - 1) // 3) if 'quarter' in parts
+        else 0)
+
+    if 'week' in parts and 'day' in parts:
+        day = weekday(_week_num(d), _js_day(d), first(year))
+    elif 'week' in parts:
+        day = weekday(_week_num(d), 0, first(year))
+    elif 'day' in parts:
+        day = weekday(1, _js_day(d), first(year))
+    elif 'date' in parts:
+        day = d.day
+    elif 'dayofyear' in parts:
+        day = d.timetuple().tm_yday
+    else:
+        day = 1
+
+    return _js_date(
+        year, month, day,
+        d.hour if 'hours' in parts else 0,
+        d.minute if 'minutes' in parts else 0,
+        d.second if 'seconds' in parts else 0,
+        d.microsecond // 1000 if 'milliseconds' in parts else 0)
+
+
+# time_unit_floor ---------------------------------------------------------------------------------
+
+@pytest.fixture(scope='module')
+def dates():
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp('1990-01-01').value
+    end = pd.Timestamp('2040-01-01').value
+    values = pd.to_datetime(rng.integers(start, end, 3000)).floor('ms')
+
+    # Around New Year, when weeks are most likely to go wrong.
+    edges = pd.to_datetime(['2016-12-31', '2017-01-01', '2011-01-01', '2012-01-01', '2023-01-07'])
+    return pd.Series(values.append(edges))
+
+
+@pytest.mark.parametrize('unit', [
+    'week', 'yearweek', 'weekday', 'yearweekday', 'weekdayhours', 'monthweek',
+    'day', 'yearday', 'dayhours', 'date', 'monthdate', 'yearmonthdate', 'dayofyear',
+    'yearquarter', 'quarter', 'hoursminutes', 'yearmonthdatehoursminutesseconds',
+    'secondsmilliseconds',
+])
+def test_time_unit_floor_matches_vega(dates, unit):
+    _, parts = _aggregate.parse_time_unit(unit)
+    floored = _aggregate.time_unit_floor(dates, unit)
+
+    expected = [vega_floor(d.to_pydatetime(), parts) for d in dates]
+    actual = pd.to_datetime(floored).to_pydatetime().tolist()
+
+    mismatches = [(d, a, e) for (d, a, e) in zip(dates, actual, expected) if a != e]
+    assert not mismatches, mismatches[:5]
+
+
+def test_time_unit_floor_week_example():
+    dates = pd.Series(pd.to_datetime(['2016-12-31', '2017-01-01']))
+    floored = pd.to_datetime(_aggregate.time_unit_floor(dates, 'week'))
+
+    # 2016-12-31 is in week 52 of 2016, and 2017-01-01 (a Sunday) in week 1 of 2017.
+    assert list(floored) == [pd.Timestamp('2012-12-23'), pd.Timestamp('2012-01-01')]
+
+
+def test_time_unit_floor_utc_converts_aware_dates():
+    dates = pd.Series(pd.to_datetime(['2024-03-10 23:30']).tz_localize('America/New_York'))
+
+    local = pd.to_datetime(_aggregate.time_unit_floor(dates, 'yearmonthdate'))
+    utc = pd.to_datetime(_aggregate.time_unit_floor(dates, 'utcyearmonthdate'))
+
+    assert list(local) == [pd.Timestamp('2024-03-10')]
+    assert list(utc) == [pd.Timestamp('2024-03-11')]
+
+
+@pytest.mark.parametrize('unit, expected', [
+    ('day', 't (day)'),
+    ('utchours', 't (hours)'),
+    ('yearmonthdate', 't (year-month-date)'),
+    ('monthdatehours', 't (month-date-hours)'),
+    ('dayhours', 't (day-hours)'),
+    ('yeardayofyear', 't (year-dayofyear)'),
+    ('hoursminutessecondsmilliseconds', 't (hours-minutes-seconds-milliseconds)'),
+])
+def test_time_unit_title_matches_vega_lite(unit, expected):
+    assert _aggregate.time_unit_title('t', unit) == expected
+
+
+# Binning -----------------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('extent, maxbins, expected', [
+    # Same bins as Vega's bin transform.
+    ((0, 100), 10, (0, 100, 10)),
+    ((0, 100), 20, (0, 100, 5)),
+    ((0, 1), 10, (0, 1, 0.1)),
+    ((0.13, 9.87), 10, (0, 10, 1)),
+    ((1, 9), 10, (1, 9, 1)),
+    ((5, 5), 10, (5, 5.5, 0.5)),
+])
+def test_bin_params_match_vega(extent, maxbins, expected):
+    start, stop, step = _aggregate.bin_params(dict(maxbins=maxbins), np.array(extent, float))
+    assert (start, stop, step) == pytest.approx(expected)
+
+
+def test_bin_index_matches_numpy_histogram():
+    values = np.random.default_rng(0).standard_normal(10_000)
+    values[::100] = np.nan
+
+    start, stop, step = _aggregate.bin_params(True, values)
+    index, num_bins = _aggregate.bin_index(values, start, stop, step)
+    counts, _ = _aggregate.reduce(index, num_bins, None, 'count')
+
+    edges = start + step * np.arange(num_bins + 1)
+    expected, _ = np.histogram(values[~np.isnan(values)], bins=edges)
+
+    assert list(counts) == list(expected)
+    assert (index == -1).sum() == np.isnan(values).sum()
+
+
+def make_groups():
+    rng = np.random.default_rng(0)
+    index = rng.integers(-1, 20, 1000)
+    values = rng.integers(0, 50, 1000).astype('float64')
+    values[::7] = np.nan
+
+    frame = pd.DataFrame(dict(index=index, value=values))
+    grouped = frame[frame['index'] >= 0].groupby('index')['value']
+
+    return index, values, grouped
+
+
+@pytest.mark.parametrize('op', ['sum', 'mean', 'min', 'max', 'median', 'valid'])
+def test_reduce_matches_pandas(op):
+    index, values, grouped = make_groups()
+    result, nonempty = _aggregate.reduce(index, 25, values, op)
+
+    expected = grouped.count() if op == 'valid' else grouped.agg(op)
+
+    assert list(np.flatnonzero(nonempty)) == list(expected.index)
+    np.testing.assert_allclose(result[expected.index.to_numpy()], expected.to_numpy())
+
+
+def test_reduce_distinct_counts_missing_values_like_vega():
+    index, values, grouped = make_groups()
+    result, nonempty = _aggregate.reduce(index, 25, values, 'distinct')
+
+    # Vega counts the distinct values as strings, so NaN is one of them.
+    expected = grouped.agg(lambda s: len(set(s.astype(str))))
+
+    assert list(np.flatnonzero(nonempty)) == list(expected.index)
+    np.testing.assert_allclose(result[expected.index.to_numpy()], expected.to_numpy())
+
+
+# Folding -----------------------------------------------------------------------------------------
+
+def reference_fold_others(data, key, values, by, keep, other_label):
+    frame = data.copy()
+    frame[key] = frame[key].astype(str)
+    frame.loc[~frame[key].isin([str(k) for k in keep]), key] = other_label
+    return frame.groupby([key, *by])[values].sum()
+
+
+def test_fold_others_matches_reference():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(dict(
+        name=rng.choice(list('abcdefgh'), 1000),
+        group=rng.choice(['x', 'y'], 1000),
+        v=rng.integers(0, 100, 1000),
+        w=rng.standard_normal(1000),
+    ))
+    keep = _aggregate.top_keys(data, 'name', ['v'], 3)
+
+    folded, order = _aggregate.fold_others(data, 'name', ['v', 'w'], ['group'], keep, 'Other')
+    expected = reference_fold_others(data, 'name', ['v', 'w'], ['group'], keep, 'Other')
+
+    actual = folded.set_index(['name', 'group']).sort_index()
+    pd.testing.assert_frame_equal(actual, expected.sort_index(), check_dtype=False)
+
+    assert order == [*keep, 'Other']
+    totals = data.groupby('name')['v'].sum().sort_values(ascending=False)
+    assert keep == totals.index[:3].tolist()
+
+
+def test_fold_others_without_anything_to_fold():
+    data = pd.DataFrame(dict(name=[1, 2], v=[3, 4]))
+
+    folded, order = _aggregate.fold_others(data, 'name', ['v'], [], [1, 2], 'Other')
+
+    assert order == ['1', '2']
+    assert folded.to_dict('list') == dict(name=['1', '2'], v=[3, 4])
@@ -0,0 +1,130 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import plost
+from plost import _cache
+
+
+@pytest.fixture
+def drawn(monkeypatch):
+    specs = []
+    monkeypatch.setattr(
+        plost.st, 'vega_lite_chart', lambda spec, use_container_width=False: specs.append(spec))
+    return specs
+
+
+def make_data(n=5000):
+    return pd.DataFrame(dict(
+        x=np.arange(n),
+        y=np.zeros(n),
+        name=np.array(['a', 'b'])[np.arange(n) % 2],
+    ))
+
+
+def test_same_data_hits_the_cache(drawn):
+    plost.line_chart(make_data(), 'x', 'y', color='name')
+    plost.line_chart(make_data(), 'x', 'y', color='name')
+
+    assert len(drawn) == 2
+    assert drawn[0] is not drawn[1]
+    assert drawn[0]['datasets'] == drawn[1]['datasets']
+    assert len(plost._SPEC_CACHE._entries) == 1
+
+
+@pytest.mark.parametrize('dtype', ['str', 'object', pd.CategoricalDtype(['a', 'b', 'c'])])
+def test_editing_any_row_invalidates_the_cache(drawn, dtype):
+    data = make_data().astype({'name': dtype})
+    plost.line_chart(data, 'x', 'y', color='name')
+
+    edited = data.copy()
+    edited.loc[1234, 'name'] = 'c'
+    plost.line_chart(edited, 'x', 'y', color='name')
+
+    assert 'c' not in set(drawn[-2]['datasets']['data']['name'])
+    assert 'c' in set(drawn[-1]['datasets']['data']['name'])
+
+
+def test_fingerprint_sees_index_and_value_edits():
+    data = make_data()
+    base = _cache.fingerprint(data)
+
+    assert _cache.fingerprint(data.copy()) == base
+    assert _cache.fingerprint(data.set_axis(data.index + 1)) != base
+
+    edited = data.copy()
+    edited.loc[4321, 'y'] = 1e-9
+    assert _cache.fingerprint(edited) != base
+
+
+@pytest.mark.parametrize('values', [
+    pd.Series([1, 2, None], dtype='Int64'),
+    pd.Series(['a', 'b', None], dtype='string[python]'),
+    pd.Series(['a', 'b', None], dtype='string[pyarrow]'),
+    pd.Series([1.5, 2.5, None], dtype='float64[pyarrow]'),
+    pd.Series(pd.date_range('2024-01-01', periods=3, tz='Europe/Lisbon')),
+    pd.Series(pd.to_timedelta([1, 2, 3], unit='s')),
+    pd.Series([True, False, True]),
+], ids=lambda values: str(values.dtype))
+def test_fingerprint_sees_edits_of_any_type(values):
+    edited = values.copy()
+    edited.iloc[1] = values.iloc[0]
+
+    assert _cache.fingerprint(values.copy()) == _cache.fingerprint(values)
+    assert _cache.fingerprint(edited) != _cache.fingerprint(values)
+
+
+def test_fingerprint_tells_slices_of_the_same_buffers_apart():
+    values = pd.Series(['a', 'b', 'a', 'b'], dtype='string[pyarrow]')
+
+    assert (
+        _cache.fingerprint(values.iloc[:2].reset_index(drop=True))
+        != _cache.fingerprint(values.iloc[1:3].reset_index(drop=True)))
+
+
+def test_fingerprint_sees_multi_index_edits():
+    data = pd.DataFrame(dict(a=[1, 2, 3]))
+    index = pd.MultiIndex.from_tuples([('x', 1), ('x', 2), ('y', 1)])
+    edited = pd.MultiIndex.from_tuples([('x', 1), ('x', 2), ('y', 2)])
+
+    assert _cache.fingerprint(data.set_axis(edited)) != _cache.fingerprint(data.set_axis(index))
+    assert _cache.fingerprint(data.set_axis(range(1, 4))) != _cache.fingerprint(data)
+
+
+def test_spec_nbytes_counts_string_contents():
+    data = pd.DataFrame(dict(name=['x' * 1000] * 100), dtype=object)
+    assert _cache.spec_nbytes(dict(datasets=dict(data=data))) > 100 * 1000
+
+
+def test_cache_respects_max_bytes():
+    cache = _cache.SpecCache()
+    cache.put('a', 1, 60, max_bytes=100)
+    cache.put('b', 2, 60, max_bytes=100)
+
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+
+    cache.put('c', 3, 200, max_bytes=100)
+    assert cache.get('c') is None
+
+
+def test_fingerprint_works_without_pyarrow():
+    # PyArrow is optional, so load the module on its own with PyArrow made unimportable.
+    code = f'''if True:
+        import importlib.util
+        import sys
+        sys.modules['pyarrow'] = None
+
+        import pandas as pd
+
+        spec = importlib.util.spec_from_file_location('_cache', {_cache.__file__!r})
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        data = pd.DataFrame(dict(a=[1, 2], b=['x', 'y'], c=pd.array([1, None], dtype='Int64')))
+        assert module.fingerprint(data) == module.fingerprint(data.copy())
+    '''
+    subprocess.run([sys.executable, '-c', code], check=True)
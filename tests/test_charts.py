@@ -0,0 +1,347 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import plost
+
+
+class DrawnSpecs(list):
+    def __init__(self):
+        super().__init__()
+        self.use_container_width = []
+
+
+@pytest.fixture
+def drawn(monkeypatch):
+    """Specs passed to st.vega_lite_chart, serialized the way Streamlit would need them."""
+    specs = DrawnSpecs()
+
+    def vega_lite_chart(spec, use_container_width=False):
+        specs.use_container_width.append(use_container_width)
+        spec = dict(spec)
+        datasets = spec.pop('datasets', {})
+
+        # Fails if the spec has anything JSON can't represent, like NumPy scalars.
+        json.dumps(spec)
+
+        for frame in datasets.values():
+            pa.Table.from_pandas(frame, preserve_index=False)
+
+        spec['datasets'] = datasets
+        specs.append(spec)
+
+    monkeypatch.setattr(plost.st, 'vega_lite_chart', vega_lite_chart)
+    return specs
+
+
+def test_time_hist_server_path_uses_utc_time_units(drawn):
+    data = pd.DataFrame(dict(t=pd.date_range('2024-01-01', periods=1000, freq='h')))
+
+    plost.set_option('epoch_dates', False)
+    try:
+        plost.time_hist(data, 't', 'day', 'hours', compute='server')
+        server = drawn[-1]
+
+        plost.time_hist(data, 't', 'day', 'hours', compute='client')
+        client = drawn[-1]
+    finally:
+        plost.set_option('epoch_dates', True)
+
+    assert server['encoding']['x']['timeUnit'] == 'utcday'
+    assert server['encoding']['y']['timeUnit'] == 'utchours'
+    assert client['encoding']['x']['timeUnit'] == 'day'
+    assert client['encoding']['y']['timeUnit'] == 'hours'
+
+    binned = server['datasets']['data']
+    assert binned['count'].sum() == 1000
+    assert len(binned) == 7 * 24
+
+
+def test_x_range_accepts_numpy_scalars(drawn):
+    data = pd.DataFrame(dict(x=np.arange(100, dtype='int64'), y=np.arange(100.0)))
+
+    plost.line_chart(data, 'x', 'y', x_range=(data.x.min(), np.float32(20.5)))
+
+    scale = drawn[-1]['encoding']['x']['scale']
+    assert scale == dict(domainMin=0, domainMax=20.5)
+    assert type(scale['domainMin']) is int
+
+
+def test_x_range_dates_become_epoch_ms(drawn):
+    data = pd.DataFrame(dict(
+        t=pd.date_range('2024-01-01', periods=100, freq='h', tz='Europe/Paris'),
+        y=np.arange(100.0)))
+
+    plost.line_chart(data, 't', 'y', x_range=(data.t.iloc[10], np.datetime64('2024-01-02')))
+
+    scale = drawn[-1]['encoding']['x']['scale']
+    assert scale['domainMin'] == data.t.iloc[10].value // 1_000_000
+    assert scale['domainMax'] == pd.Timestamp('2024-01-02', tz='Europe/Paris').value // 1_000_000
+
+
+@pytest.mark.parametrize('compute', ['client', 'server'])
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_time_hist_sends_wall_clock_dates_as_epoch_ms(drawn, compute, tz):
+    dates = pd.date_range('2024-01-01', periods=1000, freq='h', tz=tz)
+    plost.time_hist(pd.DataFrame(dict(t=dates)), 't', 'day', 'hours', compute=compute)
+
+    spec = drawn[-1]
+    frame = spec['datasets']['data']
+    x_field = spec['encoding']['x']['field']
+
+    assert spec['encoding']['x']['timeUnit'] == 'utcday'
+    assert spec['encoding']['y']['timeUnit'] == 'utchours'
+    assert pd.api.types.is_integer_dtype(frame[x_field])
+    assert spec['data']['format']['parse'][x_field] == 'date'
+
+    if compute == 'client':
+        # Wall-clock times, so 00:00 in New York is still midnight once read as UTC.
+        first = pd.to_datetime(frame[x_field].iloc[0], unit='ms')
+        assert first == pd.Timestamp('2024-01-01')
+
+
+def make_points(n=10_000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(dict(x=rng.standard_normal(n), y=rng.standard_normal(n)))
+
+
+def test_hex_density_is_drawn_at_the_binned_size(drawn):
+    plost.scatter_chart(make_points(), 'x', 'y', density='hex', pan_zoom='both')
+
+    spec = drawn[-1]
+    assert (spec['width'], spec['height']) == (600, 300)
+    assert drawn.use_container_width[-1] is False
+    assert spec.get('selection') is None
+
+    plost.scatter_chart(make_points(), 'x', 'y', density='hex', width=400, height=200)
+    assert (drawn[-1]['width'], drawn[-1]['height']) == (400, 200)
+
+
+def test_hex_density_in_scatter_hist_is_drawn_at_the_binned_size(drawn):
+    plost.scatter_hist(make_points(), 'x', 'y', density='hex')
+
+    spec = drawn[-1]
+    x_hist, (scatter, y_hist) = spec['vconcat'][0], spec['vconcat'][1]['hconcat']
+
+    assert (scatter['width'], scatter['height']) == (600, 300)
+    assert x_hist['width'] == 600
+    assert y_hist['height'] == 300
+    assert drawn.use_container_width[-1] is False
+
+
+@pytest.mark.parametrize('values', [[], [np.nan, np.nan], [np.nan, np.inf]])
+def test_server_binning_handles_data_without_finite_values(drawn, values):
+    data = pd.DataFrame(dict(x=np.array(values, dtype='float64')))
+    data['y'] = data['x']
+
+    plost.hist(data, 'x', compute='server')
+    assert len(drawn[-1]['datasets']['data']) == 0
+
+    plost.xy_hist(data, 'x', 'y', compute='server')
+    assert len(drawn[-1]['datasets']['data']) == 0
+
+
+def make_frame(n=2000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(dict(
+        t=pd.date_range('2024-01-01', periods=n, freq='min'),
+        x=np.arange(n, dtype='float64'),
+        a=rng.standard_normal(n).cumsum(),
+        b=rng.standard_normal(n).cumsum(),
+        series=np.array(['s1', 's2', 's3', 's4'])[np.arange(n) % 4],
+        share=np.array([100, 50, 2, 1])[np.arange(n) % 4],
+    ))
+
+
+CALLS = {
+    'line max_points': lambda d: plost.line_chart(d, 't', 'a', color='series', max_points=50),
+    'line wide max_points': lambda d: plost.line_chart(d, 't', ['a', 'b'], max_points=50),
+    'line x_range': lambda d: plost.line_chart(
+        d, 't', 'a', x_range=(d.t.iloc[100], d.t.iloc[200]), x_margin=0.1),
+    'line x_range numbers': lambda d: plost.line_chart(
+        d, 'x', 'a', x_range=(d.x.min(), d.x.quantile(0.5))),
+    'line minimap': lambda d: plost.line_chart(d, 't', 'a', pan_zoom='minimap', max_points=50),
+    'line annotations': lambda d: plost.line_chart(
+        d, 't', 'a', x_annot=d.t.iloc[::100], y_annot=pd.DataFrame(dict(v=[0.0], l=['zero']))),
+    'area x_range': lambda d: plost.area_chart(
+        d, 't', ['a', 'b'], x_range=(None, '2024-01-01 10:00')),
+    'area max_points': lambda d: plost.area_chart(d, 't', 'a', color='series', max_points=50),
+    'bar top_k': lambda d: plost.bar_chart(d, 'series', 'share', top_k=2, other_label='Rest'),
+    'bar top_k wide': lambda d: plost.bar_chart(d, 'series', ['a', 'b'], top_k=2),
+    'scatter rect': lambda d: plost.scatter_chart(d, 'a', 'b', density='rect'),
+    'scatter hex': lambda d: plost.scatter_chart(d, 'a', 'b', color='series', density='hex'),
+    'scatter auto': lambda d: plost.scatter_chart(d, 'a', 'b', density='auto', max_points=100),
+    'pie fold_below': lambda d: plost.pie_chart(d, 'share', 'series', fold_below=0.05),
+    'donut fold_below': lambda d: plost.donut_chart(
+        d, 'share', 'series', fold_below=0.05, other_label='Rest'),
+    'event bucket': lambda d: plost.event_chart(d, 't', 'series', density='bucket'),
+    'event x_range': lambda d: plost.event_chart(
+        d, 't', 'series', x_range=('2024-01-01 01:00', '2024-01-01 02:00')),
+    'time_hist server': lambda d: plost.time_hist(d, 't', 'day', 'hours', compute='server'),
+    'time_hist server mean': lambda d: plost.time_hist(
+        d, 't', 'day', 'hours', color='a', aggregate='mean', compute='server'),
+    'xy_hist server': lambda d: plost.xy_hist(d, 'a', 'b', compute='server'),
+    'hist server': lambda d: plost.hist(d, 'a', compute='server'),
+    'hist server mean': lambda d: plost.hist(d, 'a', 'b', aggregate='mean', compute='server'),
+    'scatter_hist rect': lambda d: plost.scatter_hist(d, 'a', 'b', density='rect'),
+    'scatter_hist auto': lambda d: plost.scatter_hist(
+        d, 'a', 'b', density='auto', max_points=10),
+}
+
+OPTIONS = {
+    'defaults': {},
+    'quantize': dict(quantize=True),
+    'dictionary_encode': dict(dictionary_encode=True),
+    'fold': dict(wide_format='fold'),
+    'no epoch_dates': dict(epoch_dates=False),
+    'no projection': dict(project_columns=False),
+}
+
+
+@pytest.fixture(params=list(OPTIONS), ids=list(OPTIONS))
+def options(request):
+    old = {k: plost.get_option(k) for k in OPTIONS[request.param]}
+
+    for k, v in OPTIONS[request.param].items():
+        plost.set_option(k, v)
+
+    yield
+
+    for k, v in old.items():
+        plost.set_option(k, v)
+
+
+@pytest.mark.parametrize('name', list(CALLS))
+def test_new_arguments_build_serializable_specs(drawn, options, name):
+    CALLS[name](make_frame())
+
+    assert len(drawn) == 1
+    assert drawn[0]['datasets']
+
+
+def test_pie_fold_below_folds_small_slices(drawn):
+    plost.pie_chart(make_frame(), 'share', 'series', fold_below=0.05)
+
+    spec = drawn[-1]
+    slices = spec['datasets']['data'].set_index('series')['share'].to_dict()
+
+    assert slices == {'s1': 50_000, 's2': 25_000, 'Other': 1_500}
+    assert spec['encoding']['color']['sort'] == ['s1', 's2', 'Other']
+
+
+def test_bar_top_k_keeps_largest_bars(drawn):
+    plost.bar_chart(make_frame(), 'series', 'share', top_k=1, other_label='Rest')
+
+    spec = drawn[-1]
+    bars = spec['datasets']['data'].groupby('series', observed=True)['share'].sum().to_dict()
+
+    assert bars == {'s1': 50_000, 'Rest': 26_500}
+    assert spec['encoding']['x']['sort'] == ['s1', 'Rest']
+
+
+def test_x_range_slices_rows(drawn):
+    data = make_frame()
+    plost.line_chart(data, 'x', 'a', x_range=(100, 200))
+
+    x = drawn[-1]['datasets']['data']['x']
+
+    # One row past each end, so the line reaches the edges.
+    assert (x.min(), x.max()) == (99, 201)
+
+
+def annotation_layers(spec):
+    return [(layer, spec['datasets'][layer['data']['name']]) for layer in spec['layer'][1:]]
+
+
+@pytest.mark.parametrize('annot, coords, labels', [
+    (0.5, [0.5], ['']),
+    (0, [0], ['']),
+    ([1, 2, 3], [1, 2, 3], ['', '', '']),
+    ({1: 'one', 2: 'two'}, [1, 2], ['one', 'two']),
+    (pd.Series([4, 5], index=[10, 20]), [4, 5], ['', '']),
+    (pd.DataFrame(dict(v=[6, 7], l=['six', 'seven'])), [6, 7], ['six', 'seven']),
+], ids=['float', 'zero', 'list', 'dict', 'series', 'dataframe'])
+def test_annotations_are_one_rule_layer(drawn, annot, coords, labels):
+    plost.line_chart(make_frame(10), 'x', 'a', y_annot=annot, pan_zoom=None)
+
+    [(layer, frame)] = annotation_layers(drawn[-1])
+
+    assert layer['mark'] == 'rule'
+    assert layer['encoding']['y'] == dict(field='a', type='quantitative')
+    assert list(frame['a']) == coords
+    assert list(frame['tooltip']) == [f'{l} ({c})' for c, l in zip(coords, labels)]
+
+
+def test_timestamp_annotations_share_the_x_field(drawn):
+    data = make_frame(10)
+    plost.line_chart(data, 't', 'a', x_annot=data.t.iloc[3], pan_zoom=None)
+
+    [(layer, frame)] = annotation_layers(drawn[-1])
+
+    assert layer['encoding']['x'] == dict(field='t', type='temporal')
+    assert list(frame['t']) == [data.t.iloc[3].value // 1_000_000]
+
+
+@pytest.mark.parametrize('annot', [None, [], {}, pd.Series([], dtype='float64')])
+def test_empty_annotations_add_no_layer(drawn, annot):
+    plost.line_chart(make_frame(10), 'x', 'a', x_annot=annot, pan_zoom=None)
+    assert 'layer' not in drawn[-1]
+
+
+def test_time_hist_server_path_keeps_the_date_column_titles(drawn):
+    data = pd.DataFrame(dict(t=pd.date_range('2024-01-01', periods=1000, freq='h')))
+    plost.time_hist(data, 't', 'day', 'hours', compute='server')
+
+    encoding = drawn[-1]['encoding']
+    assert encoding['x']['title'] == 't (day)'
+    assert encoding['y']['title'] == 't (hours)'
+    assert encoding['x']['axis']['title'] is None
+    assert encoding['y']['axis']['title'] is None
+
+
+def test_time_hist_server_distinct_counts_missing_values(drawn):
+    data = pd.DataFrame(dict(
+        t=pd.to_datetime(['2024-01-01 10:00'] * 4 + ['2024-01-02 10:00'] * 2),
+        v=['a', 'b', None, None, None, None],
+    ))
+    plost.time_hist(data, 't', 'day', 'hours', color='v', aggregate='distinct', compute='server')
+
+    assert sorted(drawn[-1]['datasets']['data']['v']) == [1, 3]
+
+
+def test_minimap_gets_its_own_low_resolution_dataset(monkeypatch):
+    specs = []
+    monkeypatch.setattr(plost.st, 'vega_lite_chart', lambda spec, **kwargs: specs.append(spec))
+
+    data = make_frame(5000)
+    plost.line_chart(data, 'x', ['a', 'b'], pan_zoom='minimap')
+
+    spec = specs[-1]
+    main_view, minimap_view = spec['vconcat']
+    minimap = spec['datasets'][minimap_view['data']['name']]
+
+    assert 'data' not in main_view
+    assert minimap['variable'].value_counts().max() <= plost._MINIMAP_POINTS
+
+    # Downsampling keeps each series' first and last points, so the brush spans the same range.
+    for name, series in minimap.groupby('variable', observed=True):
+        assert (series['x'].min(), series['x'].max()) == (0, 4999)
+
+
+def test_fold_keeps_wide_data_and_adds_a_fold_transform(drawn):
+    plost.set_option('wide_format', 'fold')
+    try:
+        plost.line_chart(make_frame(100), 'x', ['a', 'b'], pan_zoom=None)
+    finally:
+        plost.set_option('wide_format', 'melt')
+
+    spec = drawn[-1]
+
+    assert spec['transform'] == [dict(fold=['a', 'b'], **{'as': ['variable', 'value']})]
+    assert spec['encoding']['y'] == dict(field='value', type='quantitative', title=None)
+    assert spec['encoding']['color']['field'] == 'variable'
+    assert list(spec['datasets']['data'].columns) == ['x', 'a', 'b']
+    assert len(spec['datasets']['data']) == 100
@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plost import _downsample
+
+
+def reference_lttb(x, y, threshold):
+    """Sveinn Steinarsson's reference LTTB, one point at a time."""
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    picked = [0]
+
+    for i in range(threshold - 2):
+        avg_start = int(math.floor((i + 1) * every)) + 1
+        avg_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+
+        range_start = int(math.floor(i * every)) + 1
+        range_end = int(math.floor((i + 1) * every)) + 1
+
+        max_area = -1
+        next_a = range_start
+
+        for j in range(range_start, range_end):
+            area = abs(
+                (x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) / 2
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        picked.append(next_a)
+        a = next_a
+
+    picked.append(n - 1)
+    return picked
+
+
+@pytest.mark.parametrize('n, threshold', [(10, 5), (1000, 100), (1001, 37), (5000, 3)])
+def test_lttb_indices_match_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 100, n))
+    y = rng.standard_normal(n).cumsum()
+
+    picked = _downsample.lttb_indices(x, y, threshold)
+
+    assert list(picked) == reference_lttb(list(x), list(y), threshold)
+
+
+def test_lttb_keeps_every_point_when_under_the_limit():
+    x = np.arange(10.0)
+    assert list(_downsample.lttb_indices(x, x, 10)) == list(range(10))
+    assert list(_downsample.lttb_indices(x, x, 2)) == list(range(10))
+
+
+def test_lttb_downsamples_each_series_separately():
+    n = 1000
+    data = pd.DataFrame(dict(
+        x=np.tile(np.arange(n), 2),
+        y=np.random.default_rng(0).standard_normal(2 * n),
+        series=np.repeat(['a', 'b'], n),
+    ))
+
+    result = _downsample.lttb(data, 'x', 'y', 50, by='series')
+
+    assert result.groupby('series').size().to_dict() == dict(a=50, b=50)
+
+    for name, group in result.groupby('series'):
+        original = data[data.series == name].reset_index(drop=True)
+        expected = reference_lttb(list(original.x), list(original.y), 50)
+        assert list(group.x) == list(original.x.iloc[expected])
+
+
+def test_lttb_handles_datetimes():
+    data = pd.DataFrame(dict(
+        t=pd.date_range('2024-01-01', periods=1000, freq='s', tz='UTC'),
+        y=np.random.default_rng(0).standard_normal(1000),
+    ))
+
+    result = _downsample.lttb(data, 't', 'y', 100)
+
+    assert len(result) == 100
+    assert result.t.dtype == data.t.dtype
+    assert result.t.is_monotonic_increasing
+
+
+def test_bucket_merges_rows_per_slice():
+    data = pd.DataFrame(dict(
+        x=[0.0, 0.1, 0.2, 5.0, 9.9, 10.0],
+        y=['a', 'a', 'b', 'a', 'a', 'a'],
+    ))
+
+    result = _downsample.bucket(data, 'x', ['y'], 2, 'count')
+    result = result.sort_values(['y', 'x']).reset_index(drop=True)
+
+    # Slices are [0, 5) and [5, 10].
+    assert list(result.y) == ['a', 'a', 'b']
+    assert list(result['count']) == [2, 3, 1]
+    assert result.x.tolist() == pytest.approx([0.05, (5.0 + 9.9 + 10.0) / 3, 0.2])
@@ -0,0 +1,150 @@
+import pandas as pd
+from streamlit.delta_generator import DeltaGenerator
+
+import plost
+from plost import _live
+from plost import _transport
+
+
+MAIN = _transport.MAIN_DATASET
+
+
+def make_data(start, n):
+    return pd.DataFrame(dict(
+        x=range(start, start + n),
+        a=[float(i) for i in range(start, start + n)],
+        b=[float(-i) for i in range(start, start + n)],
+    ))
+
+
+class AppendingElement:
+    """An element from a Streamlit version that supports add_rows."""
+
+    def __init__(self):
+        self.added = []
+        self.drawn = []
+
+    def add_rows(self, **datasets):
+        self.added.append(datasets)
+
+    def vega_lite_chart(self, spec, use_container_width=False):
+        self.drawn.append(spec)
+        return self
+
+
+def test_real_delta_generator_has_no_add_rows():
+    assert not _live._supports_add_rows(DeltaGenerator())
+    assert _live._supports_add_rows(AppendingElement())
+
+
+def test_add_rows_redraws_real_delta_generator(drawn_specs):
+    chart = plost.line_chart(make_data(0, 10), 'x', 'a', pan_zoom=None)
+    chart.add_rows(make_data(10, 5))
+
+    assert len(drawn_specs) == 2
+    assert isinstance(chart._element, DeltaGenerator)
+    assert list(drawn_specs[-1]['datasets'][MAIN]['x']) == list(range(15))
+
+
+def test_add_rows_melts_wide_rows(drawn_specs):
+    chart = plost.line_chart(make_data(0, 10), 'x', ['a', 'b'], pan_zoom=None)
+    chart.add_rows(make_data(10, 3))
+
+    main = drawn_specs[-1]['datasets'][MAIN]
+    assert len(main) == 26
+    assert sorted(main['variable'].astype(str).unique()) == ['a', 'b']
+
+
+def test_add_rows_redraws_once_per_call_with_minimap(drawn_specs):
+    chart = plost.line_chart(make_data(0, 100), 'x', 'a', pan_zoom='minimap')
+    chart.add_rows(make_data(100, 10))
+
+    assert len(drawn_specs) == 2
+    assert len(drawn_specs[-1]['datasets'][MAIN]) == 110
+
+
+def test_add_rows_sends_only_new_rows_when_supported(monkeypatch):
+    element = AppendingElement()
+    monkeypatch.setattr(plost.st, 'vega_lite_chart', element.vega_lite_chart)
+
+    chart = plost.line_chart(make_data(0, 10), 'x', 'a', pan_zoom=None)
+    chart.add_rows(make_data(10, 5))
+
+    assert len(element.drawn) == 1
+    assert len(element.added) == 1
+    assert list(element.added[0][MAIN]['x']) == list(range(10, 15))
+
+
+def make_timed_data(start, n):
+    return pd.DataFrame(dict(
+        t=pd.date_range('2024-01-01', periods=start + n, freq='min')[start:],
+        a=[float(i) for i in range(start, start + n)],
+    ))
+
+
+def test_retain_max_rows_evicts_oldest_rows(drawn_specs):
+    chart = plost.line_chart(make_data(0, 10), 'x', 'a', pan_zoom=None).retain(max_rows=20)
+    assert len(drawn_specs) == 1
+
+    chart.add_rows(make_data(10, 15))
+
+    assert list(drawn_specs[-1]['datasets'][MAIN]['x']) == list(range(5, 25))
+
+    chart.add_rows(make_data(25, 100))
+
+    assert list(drawn_specs[-1]['datasets'][MAIN]['x']) == list(range(105, 125))
+
+
+def test_retain_time_window_evicts_old_rows(drawn_specs):
+    chart = plost.line_chart(make_timed_data(0, 60), 't', 'a', pan_zoom=None)
+    chart.retain(time_window='30min')
+
+    # Rows older than the window are evicted right away.
+    assert len(drawn_specs) == 2
+    assert list(drawn_specs[-1]['datasets'][MAIN]['a']) == [float(i) for i in range(29, 60)]
+
+    chart.add_rows(make_timed_data(60, 10))
+
+    main = drawn_specs[-1]['datasets'][MAIN]
+    assert list(main['a']) == [float(i) for i in range(39, 70)]
+
+    # Dates are sent as epoch milliseconds, and the window is measured in the same unit.
+    times = pd.to_datetime(main['t'].astype('int64'), unit='ms')
+    assert times.max() - times.min() == pd.Timedelta('30min')
+
+
+def test_retain_summary_keeps_evicted_history(drawn_specs):
+    chart = plost.line_chart(make_data(0, 10), 'x', 'a', pan_zoom=None)
+    chart.retain(max_rows=10, summary_points=5)
+    chart.add_rows(make_data(10, 100))
+
+    x = list(drawn_specs[-1]['datasets'][MAIN]['x'])
+    assert x[-10:] == list(range(100, 110))
+    assert 0 < len(x) - 10 <= 10
+    assert x == sorted(x)
+
+
+def test_retain_appends_until_redraw_when_supported(monkeypatch):
+    element = AppendingElement()
+    monkeypatch.setattr(plost.st, 'vega_lite_chart', element.vega_lite_chart)
+
+    chart = plost.line_chart(make_data(0, 10), 'x', 'a', pan_zoom=None).retain(max_rows=2000)
+    chart.add_rows(make_data(10, 500))
+
+    assert len(element.drawn) == 1
+    assert len(element.added) == 1
+
+    chart.add_rows(make_data(510, 600))
+
+    assert len(element.drawn) == 2
+    assert list(element.drawn[-1]['datasets'][MAIN]['x']) == list(range(1110))
+
+
+def test_add_rows_to_event_chart(drawn_specs):
+    data = pd.DataFrame(dict(t=pd.date_range('2024-01-01', periods=10, freq='h'), kind='a'))
+    chart = plost.event_chart(data, 't', 'kind', pan_zoom=None)
+    chart.add_rows(pd.DataFrame(dict(t=[pd.Timestamp('2024-01-02')], kind=['b'])))
+
+    main = drawn_specs[-1]['datasets'][MAIN]
+    assert len(main) == 11
+    assert list(main['kind'])[-1] == 'b'
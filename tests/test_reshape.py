@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from plost import _reshape
+
+
+def make_data(n=50):
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(n)
+    values[::7] = np.nan
+
+    return pd.DataFrame(dict(
+        t=pd.date_range('2024-01-01', periods=n, freq='h'),
+        t_tz=pd.date_range('2024-01-01', periods=n, freq='h', tz='Europe/Berlin'),
+        label=pd.Categorical(np.array(['x', 'y'])[np.arange(n) % 2]),
+        name=np.array(['p', 'q', 'r'])[np.arange(n) % 3],
+        a=values,
+        b=rng.standard_normal(n),
+        i=np.arange(n),
+        s=pd.Series(np.arange(n), dtype='Int64'),
+    ))
+
+
+@pytest.mark.parametrize('id_vars, value_vars', [
+    (['t'], ['a', 'b']),
+    (['t_tz', 'label'], ['a', 'b']),
+    (['name'], ['a']),
+    (['t'], ['a', 'i']),
+    (['t'], ['i', 's']),
+    (['t'], ['a', 'a']),
+    ([], ['a', 'b']),
+], ids=str)
+def test_melt_matches_pandas(id_vars, value_vars):
+    data = make_data()
+
+    actual = _reshape.melt(data, id_vars, value_vars, 'variable', 'value')
+    expected = data.melt(
+        id_vars=id_vars, value_vars=value_vars, var_name='variable', value_name='value')
+
+    assert list(actual.columns) == list(expected.columns)
+    assert actual['variable'].astype(str).tolist() == expected['variable'].astype(str).tolist()
+
+    pd.testing.assert_frame_equal(
+        actual.drop(columns='variable'), expected.drop(columns='variable'))
+
+
+def test_melt_stores_series_names_as_categorical_codes():
+    melted = _reshape.melt(make_data(), ['t'], ['a', 'b'], 'variable', 'value')
+
+    assert isinstance(melted['variable'].dtype, pd.CategoricalDtype)
+    assert list(melted['variable'].cat.categories) == ['a', 'b']
+    assert melted['variable'].cat.codes.dtype == 'int8'
+    assert melted['value'].dtype == 'float64'
+
+
+def test_melt_empty_frame():
+    data = make_data().iloc[:0]
+    melted = _reshape.melt(data, ['t'], ['a', 'b'], 'variable', 'value')
+
+    assert len(melted) == 0
+    assert list(melted.columns) == ['t', 'variable', 'value']
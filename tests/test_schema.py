@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from plost import _schema
+
+
+@pytest.mark.parametrize('dtype, expected', [
+    ('int8', 'quantitative'),
+    ('uint64', 'quantitative'),
+    ('float32', 'quantitative'),
+    ('Int64', 'quantitative'),
+    ('Float64', 'quantitative'),
+    ('timedelta64[ns]', 'quantitative'),
+    ('bool', 'nominal'),
+    ('boolean', 'nominal'),
+    ('complex128', 'nominal'),
+    ('object', 'nominal'),
+    ('str', 'nominal'),
+    ('string[pyarrow]', 'nominal'),
+    ('category', 'nominal'),
+    (pd.CategoricalDtype(['a', 'b'], ordered=True), 'ordinal'),
+    ('datetime64[ns]', 'temporal'),
+    ('datetime64[s]', 'temporal'),
+    (pd.DatetimeTZDtype(tz='Asia/Tokyo'), 'temporal'),
+    (pd.PeriodDtype('D'), 'temporal'),
+], ids=str)
+def test_vega_type(dtype, expected):
+    assert _schema.vega_type(pd.Series([], dtype=dtype).dtype) == expected
+
+
+def test_vega_type_of_numpy_dtypes():
+    assert _schema.vega_type(np.dtype('int32')) == 'quantitative'
+    assert _schema.vega_type(np.dtype('datetime64[ms]')) == 'temporal'
+    assert _schema.vega_type(np.dtype('U5')) == 'nominal'
+
+
+def test_infer_types_follows_dtype_changes():
+    data = pd.DataFrame(dict(a=[1, 2], b=['x', 'y']))
+    assert _schema.infer_types(data) == dict(a='quantitative', b='nominal')
+
+    data['a'] = data['a'].astype(str)
+    data['c'] = pd.to_datetime(['2024-01-01', '2024-01-02'])
+    assert _schema.infer_types(data) == dict(a='nominal', b='nominal', c='temporal')
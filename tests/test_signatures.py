@@ -0,0 +1,106 @@
+"""New chart parameters go after the old ones, so positional calls keep working."""
+
+import inspect
+
+import numpy as np
+import pandas as pd
+
+import plost
+
+
+def assert_added_last(func, *names):
+    params = list(inspect.signature(func).parameters)
+    last_old = params.index('use_container_width')
+
+    assert all(params.index(name) > last_old for name in names)
+
+
+def make_data(n=100):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(dict(x=rng.standard_normal(n), y=rng.standard_normal(n)))
+
+
+def draw_positionally(monkeypatch, func, *args):
+    drawn = []
+    monkeypatch.setattr(
+        plost.st, 'vega_lite_chart', lambda spec, use_container_width=False: drawn.append(spec))
+    func(*args)
+    return drawn[-1]
+
+
+def test_hist_compute(monkeypatch):
+    assert_added_last(plost.hist, 'compute')
+
+    spec = draw_positionally(
+        monkeypatch, plost.hist, make_data(), 'x', None, 'count', None, None, None, 400, 200, 'T')
+    assert (spec['width'], spec['height'], spec['title']) == (400, 200, 'T')
+
+
+def test_xy_hist_compute(monkeypatch):
+    assert_added_last(plost.xy_hist, 'compute')
+
+    spec = draw_positionally(
+        monkeypatch, plost.xy_hist,
+        make_data(), 'x', 'y', None, 'count', None, None, None, None, 400, 200, 'T')
+    assert (spec['width'], spec['height'], spec['title']) == (400, 200, 'T')
+
+
+def test_time_hist_compute(monkeypatch):
+    assert_added_last(plost.time_hist, 'compute')
+
+    data = pd.DataFrame(dict(t=pd.date_range('2024-01-01', periods=100, freq='h')))
+    spec = draw_positionally(
+        monkeypatch, plost.time_hist,
+        data, 't', 'day', 'hours', None, 'count', None, None, 400, 200, 'T')
+    assert (spec['width'], spec['height'], spec['title']) == (400, 200, 'T')
+
+
+def test_line_and_area_max_points():
+    assert_added_last(plost.line_chart, 'max_points')
+    assert_added_last(plost.area_chart, 'max_points')
+
+
+def test_scatter_chart_density(monkeypatch):
+    assert_added_last(plost.scatter_chart, 'density', 'max_points')
+
+    spec = draw_positionally(
+        monkeypatch, plost.scatter_chart,
+        make_data(), 'x', 'y', None, None, None, None, None, 400, 200, 'T')
+    assert (spec['width'], spec['height'], spec['title']) == (400, 200, 'T')
+
+
+def test_scatter_hist_density(monkeypatch):
+    assert_added_last(plost.scatter_hist, 'density', 'max_points')
+
+    spec = draw_positionally(
+        monkeypatch, plost.scatter_hist,
+        make_data(), 'x', 'y', None, None, None, 'count', None, None, 400, 200, 'T')
+    assert spec['title'] == 'T'
+
+
+def test_event_chart_density():
+    assert_added_last(plost.event_chart, 'density', 'max_points')
+
+
+def test_bar_chart_top_k(monkeypatch):
+    assert_added_last(plost.bar_chart, 'top_k', 'other_label')
+
+    data = pd.DataFrame(dict(bar=['a', 'b'], value=[1, 2]))
+    spec = draw_positionally(
+        monkeypatch, plost.bar_chart,
+        data, 'bar', 'value', None, None, None, None, 'vertical', 400, 200, 'T')
+    assert (spec['width'], spec['height'], spec['title']) == (400, 200, 'T')
+
+
+def test_pie_and_donut_fold_below():
+    assert_added_last(plost.pie_chart, 'fold_below', 'other_label')
+    assert_added_last(plost.donut_chart, 'fold_below', 'other_label')
+
+
+def test_x_range(monkeypatch):
+    for func in [plost.line_chart, plost.area_chart, plost.event_chart]:
+        assert_added_last(func, 'x_range', 'x_margin')
+
+    spec = draw_positionally(
+        monkeypatch, plost.line_chart, make_data(), 'x', 'y', None, None, None, None, 400, 200, 'T')
+    assert (spec['width'], spec['height'], spec['title']) == (400, 200, 'T')
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+from plost import _transport
+
+
+def test_project_columns_drops_unused_columns():
+    data = pd.DataFrame(dict(a=[1], b=[2], c=[3]))
+    spec = dict(data=data, encoding=dict(x=dict(field='a'), y=dict(field='c')))
+
+    assert list(_transport.project_columns(spec)['data'].columns) == ['a', 'c']
+
+
+def test_project_columns_keeps_frames_with_non_string_labels():
+    data = pd.DataFrame({0: [1], 1: [2], 'a': [3]})
+    spec = dict(data=data, encoding=dict(x=dict(field='0'), y=dict(field='a')))
+
+    assert _transport.project_columns(spec)['data'] is data
+
+    data = pd.DataFrame([[1, 2]], columns=pd.MultiIndex.from_tuples([('a', 'x'), ('a', 'y')]))
+    spec = dict(data=data, encoding=dict(x=dict(field='a')))
+
+    assert _transport.project_columns(spec)['data'] is data
+
+
+def test_name_datasets_shares_frames_across_views():
+    main = pd.DataFrame(dict(a=[1]))
+    other = pd.DataFrame(dict(b=[2]))
+    spec = dict(
+        data=main,
+        vconcat=[
+            dict(mark='line', data=other),
+            dict(layer=[dict(mark='rule', data=other), dict(mark='line')]),
+        ],
+    )
+
+    named = _transport.name_datasets(spec)
+
+    assert named['data'] == dict(name='data')
+    assert named['vconcat'][0]['data'] == named['vconcat'][1]['layer'][0]['data']
+    assert named['vconcat'][0]['data']['name'] != 'data'
+    assert 'data' not in named['vconcat'][1]['layer'][1]
+
+    assert len(named['datasets']) == 2
+    assert named['datasets']['data'] is main
+    assert named['datasets'][named['vconcat'][0]['data']['name']] is other
+
+    # The original spec is left alone.
+    assert spec['vconcat'][0]['data'] is other
+
+
+def test_name_datasets_keeps_existing_datasets():
+    existing = pd.DataFrame(dict(a=[1]))
+    data = pd.DataFrame(dict(b=[2]))
+
+    named = _transport.name_datasets(dict(data=data, datasets=dict(data=existing)))
+
+    assert named['datasets']['data'] is existing
+    assert named['datasets'][named['data']['name']] is data
+
+
+def quantize(frame, encoding, width=100, height=100, live=False):
+    spec = dict(
+        data=dict(name='data'), width=width, height=height, mark='point', encoding=encoding,
+        datasets=dict(data=frame))
+    encoders = {}
+    return _transport.quantize(spec, encoders, live=live)['datasets']['data'], encoders
+
+
+def test_quantize_rounds_positions_to_a_tenth_of_a_pixel():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(dict(x=rng.uniform(0, 1, 1000), y=rng.uniform(0, 1000, 1000)))
+    frame.iloc[0] = [0, 0]
+    frame.iloc[1] = [1, 1000]
+    encoding = dict(
+        x=dict(field='x', type='quantitative'), y=dict(field='y', type='quantitative'))
+
+    quantized, encoders = quantize(frame, encoding)
+
+    # 100 pixels, 10 values each, over extents of 1 and 1000.
+    np.testing.assert_allclose(quantized['x'], frame['x'].round(3), atol=1e-6)
+    np.testing.assert_allclose(quantized['y'], frame['y'].round(0), atol=1e-3)
+    assert quantized['x'].dtype == 'float32'
+    assert quantized['y'].dtype == 'float32'
+
+    # New rows get the same treatment.
+    assert encoders['x'](frame['x'].iloc[:3]).dtype == 'float32'
+
+
+def test_quantize_keeps_exact_values_of_other_fields():
+    frame = pd.DataFrame(dict(
+        x=np.linspace(0, 1, 100),
+        color=np.linspace(0, 1, 100),
+        halves=np.arange(100) / 2,
+        n=np.arange(100, dtype='int64'),
+        big=np.arange(100, dtype='int64') * 100_000,
+    ))
+    encoding = dict(
+        x=dict(field='x', type='quantitative', aggregate='sum'),
+        color=dict(field='color', type='quantitative'),
+        y=dict(field='halves', type='quantitative', bin=True),
+    )
+
+    quantized, _ = quantize(frame, encoding)
+
+    # Not plain positions, and float32 would lose precision.
+    assert quantized['x'].dtype == 'float64'
+    assert quantized['color'].dtype == 'float64'
+
+    # Exactly representable, so downcast anyway.
+    assert quantized['halves'].dtype == 'float32'
+    assert quantized['n'].dtype == 'int8'
+    assert quantized['big'].dtype == 'int32'
+
+    for c in frame.columns:
+        np.testing.assert_array_equal(quantized[c].astype('float64'), frame[c])
+
+
+def test_quantize_keeps_integer_types_of_live_charts():
+    frame = pd.DataFrame(dict(n=np.arange(100, dtype='int64')))
+    quantized, encoders = quantize(frame, {}, live=True)
+
+    assert quantized['n'].dtype == 'int64'
+    assert 'n' not in encoders
+
+
+def test_encode_dictionaries_converts_repetitive_strings():
+    frame = pd.DataFrame(dict(
+        name=np.array(['a', 'b', None], dtype=object)[np.arange(30) % 3],
+        unique=[f'u{i}' for i in range(30)],
+        number=np.arange(30),
+    ))
+    spec = dict(data=dict(name='data'), datasets=dict(data=frame))
+    encoders = {}
+
+    encoded = _transport.encode_dictionaries(spec, encoders)['datasets']['data']
+
+    assert isinstance(encoded['name'].dtype, pd.CategoricalDtype)
+    assert list(encoded['name'].cat.categories) == ['a', 'b']
+    assert encoded['name'].astype(str).tolist() == frame['name'].astype(str).tolist()
+    assert encoded['unique'].dtype == frame['unique'].dtype
+    assert encoded['number'].dtype == 'int64'
+    assert set(encoders) == {'name'}
+
+
+def test_dictionary_encoder_keeps_codes_of_values_already_sent():
+    frame = pd.DataFrame(dict(name=['a', 'b'] * 10))
+    encoders = {}
+    _transport.encode_dictionaries(dict(datasets=dict(data=frame)), encoders)
+
+    new_rows = encoders['name'](pd.Series(['c', 'a', 'b']))
+
+    assert list(new_rows.cat.categories) == ['a', 'b', 'c']
+    assert list(new_rows.cat.codes) == [2, 0, 1]
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from plost import _window
+
+
+def test_in_place_edits_are_seen_between_calls():
+    data = pd.DataFrame(dict(x=np.arange(100.0)))
+
+    assert list(_window.visible_rows(data, 'x', 10, 20)['x']) == list(range(9, 22))
+
+    # Unsorts the column without touching its length, type or ends.
+    data.loc[50, 'x'] = 15.5
+
+    assert not _window.is_sorted(data, 'x')
+    assert sorted(_window.visible_rows(data, 'x', 10, 20)['x']) == [
+        *range(10, 16), 15.5, *range(16, 21)]
+
+
+def test_sorted_columns_keep_a_row_past_each_end():
+    data = pd.DataFrame(dict(t=pd.date_range('2024-01-01', periods=48, freq='h', tz='UTC')))
+
+    rows = _window.visible_rows(data, 't', '2024-01-01 10:00', '2024-01-01 12:00')
+    assert list(rows.index) == [9, 10, 11, 12, 13]
+
+
+def test_unsorted_columns_keep_only_rows_in_range():
+    data = pd.DataFrame(dict(x=[5, 1, 4, 2, 3, np.nan]))
+
+    assert list(_window.visible_rows(data, 'x', 2, 4)['x']) == [4, 2, 3]
+    assert list(_window.visible_rows(data, 'x', None, 2)['x']) == [1, 2]